@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Benchmark the dupe engine from 10k to 10M QSOs.
+
+For the smaller sizes the original per-call loop is also run and its dupe
+set is checked against the engine's.
+
+    python benchmarks/bench_dupes.py
+    python benchmarks/bench_dupes.py --sizes 10000 100000 --legacy-max 100000
+"""
+import argparse
+import datetime
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0,os.path.join(os.path.dirname(os.path.abspath(__file__)),'..'))
+from seqp_scoring.dupes import find_dupes
+import synthetic
+
+valid_modes = ['CW', 'RY', 'FT', 'PK', 'JT', 'PH']
+
+def legacy_dupes(df_seqp,calls,bands,modes):
+    """
+    The call x band x mode x call_1 loop that find_dupes replaced.
+    """
+    df_seqp = df_seqp.copy()
+    df_seqp['dupe'] = False
+    for call in calls:
+        for band in bands:
+            for mode in modes:
+                tf  = np.logical_and.reduce( (df_seqp['call_0']==call,df_seqp['band']==band,df_seqp['mode']==mode) )
+                dft = df_seqp[tf]
+                for call_1 in dft['call_1'].unique():
+                    delta   = dft[dft['call_1'] == call_1]['datetime'].diff()
+                    bad_inx = delta[delta < datetime.timedelta(minutes=10)].index
+                    if len(bad_inx) > 0:
+                        df_seqp.loc[bad_inx,'dupe'] = True
+    return df_seqp['dupe']
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--sizes',type=int,nargs='+',default=[10000,100000,1000000,10000000])
+    parser.add_argument('--legacy-max',type=int,default=10000,
+            help='Largest size to also run (and verify against) the legacy loop.')
+    args = parser.parse_args()
+
+    print('{:>10s} {:>8s} {:>10s} {:>12s} {:>10s}'.format('qsos','calls','dupes','engine [s]','legacy [s]'))
+    for size in args.sizes:
+        df_seqp = synthetic.make_qsos(size)
+        df_seqp = df_seqp[df_seqp['mode'].isin(valid_modes)]
+        calls   = df_seqp['call_0'].unique()
+
+        t_0         = time.perf_counter()
+        dupe, dupes = find_dupes(df_seqp,calls,synthetic.bands,valid_modes)
+        t_engine    = time.perf_counter() - t_0
+
+        t_legacy    = float('nan')
+        if size <= args.legacy_max:
+            t_0         = time.perf_counter()
+            expected    = legacy_dupes(df_seqp,calls,synthetic.bands,valid_modes)
+            t_legacy    = time.perf_counter() - t_0
+            assert expected.equals(dupe), 'Dupe set differs from the legacy loop at {:d} QSOs'.format(size)
+            assert dupes.sum() == expected.sum()
+
+        print('{:>10d} {:>8d} {:>10d} {:>12.3f} {:>10.3f}'.format(size,len(calls),int(dupes.sum()),t_engine,t_legacy))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Regression check of the modes that must not change the scores.
+
+    python benchmarks/check_equivalence.py --rows 20000
+
+Scores a synthetic dataset (see synthetic.py) once as the reference and then
+in every mode that promises the same output, comparing the files byte for
+byte:
+    workers, chunked, no_cache: seqp_scores.csv, seqp_drops.csv,
+        seqp_discrepancies.csv and the modes/ directory of `score` with
+        --workers, --chunk-size and --no-cache.
+    checkpoints: the same files of a second `score` run that loads every
+        stage from its checkpoint.
+    variants: the score table of every rule variant of `variants` against
+        `score --rules` with that variant alone.
+    rescore: the three tables after `rescore` of a corrected log and
+        `rescore --append` of late QSOs, against a full `score` of the input
+        with the same changes.
+Prints SAME or DIFF per file and exits with 1 if anything differs.
+"""
+import argparse
+import contextlib
+import filecmp
+import json
+import os
+import shutil
+import sys
+import tempfile
+from collections import OrderedDict
+
+bench_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0,os.path.join(bench_dir,'..'))
+
+import pandas as pd
+
+from seqp_scoring.cli import main as cli
+import synthetic
+
+tables      = ['seqp_scores.csv','seqp_drops.csv','seqp_discrepancies.csv']
+variants    = [
+        {'name':'dupe_5min','dupe_window':5},
+        {'name':'no_jt','cw_modes':['CW','RY','FT','PK']},
+        {'name':'gc_100','bonus_values':{'ground_conductivity':100}},
+    ]
+
+def run(*argv):
+    """
+    Run a seqp-scoring command quietly; raise if it fails.
+    """
+    with open(os.devnull,'w') as devnull, contextlib.redirect_stdout(devnull):
+        code = cli(list(argv))
+    if code != 0:
+        raise RuntimeError('seqp-scoring {!s} exited with {!s}'.format(' '.join(argv),code))
+
+def same_files(ref_dir,out_dir,fnames):
+    """
+    OrderedDict of fname -> True if out_dir/fname equals ref_dir/fname.
+    """
+    result = OrderedDict()
+    for fname in fnames:
+        ref, out = os.path.join(ref_dir,fname), os.path.join(out_dir,fname)
+        result[fname] = os.path.exists(out) and filecmp.cmp(ref,out,shallow=False)
+    return result
+
+def mode_files(path):
+    return sorted(os.path.join('modes',x) for x in os.listdir(os.path.join(path,'modes')))
+
+class Check(object):
+    """
+    Runs the commands of one check in work_dir against one dataset.
+    """
+    def __init__(self,csv_path,db_config,work_dir):
+        self.csv_path   = csv_path
+        self.db_config  = db_config
+        self.work_dir   = work_dir
+        self.results    = OrderedDict()
+
+    def path(self,*names):
+        return os.path.join(self.work_dir,*names)
+
+    def score(self,name,*args,**kwargs):
+        """
+        `score` into <work_dir>/<name>; returns that directory.
+        """
+        out_dir = self.path(name)
+        run('score','--input',kwargs.get('input',self.csv_path),'--db-config',self.db_config,
+            '--db-snapshot','off','--cache-dir',self.path('cache'),'--out-dir',out_dir,
+            '--state-dir',self.path(name,'state'),'--checkpoint-dir',self.path(name,'checkpoints'),
+            '--quiet',*args)
+        return out_dir
+
+    def record(self,mode,result):
+        self.results[mode] = result
+        for fname, same in result.items():
+            print('{:12s} {:40s} {!s}'.format(mode,fname,'SAME' if same else 'DIFF'))
+
+    def modes(self,ref_dir):
+        fnames  = tables + mode_files(ref_dir)
+        rows    = len(pd.read_csv(self.csv_path,usecols=['source']))
+        for mode, args in [('workers',['--workers','2']),('chunked',['--chunk-size',str(rows//7+1)]),
+                ('no_cache',['--no-cache'])]:
+            self.record(mode,same_files(ref_dir,self.score(mode,'--no-checkpoints',*args),fnames))
+
+        self.score('checkpoints')
+        out_dir = self.score('checkpoints')
+        self.record('checkpoints',same_files(ref_dir,out_dir,fnames))
+
+    def variants(self):
+        fpath   = self.path('variants.json')
+        with open(fpath,'w') as fl:
+            json.dump(variants,fl,indent=1)
+        out_dir = self.path('variants')
+        run('variants','--variants',fpath,'--input',self.csv_path,'--db-config',self.db_config,
+            '--db-snapshot','off','--cache-dir',self.path('cache'),'--out-dir',out_dir)
+        result  = OrderedDict()
+        for variant in variants:
+            rules_path = self.path('{!s}.json'.format(variant['name']))
+            with open(rules_path,'w') as fl:
+                json.dump(variant,fl)
+            ref_dir = self.score('rules_'+variant['name'],'--no-checkpoints','--no-state','--rules',rules_path)
+            fname   = 'seqp_scores_{!s}.csv'.format(variant['name'])
+            result[fname] = filecmp.cmp(os.path.join(ref_dir,'seqp_scores.csv'),os.path.join(out_dir,fname),
+                                shallow=False)
+        self.record('variants',result)
+
+    def rescore(self):
+        """
+        Rescore a corrected log of two calls and late QSOs of a third, and
+        score the input with the same changes from scratch.
+        """
+        df      = pd.read_csv(self.csv_path)
+        seqp    = df[df['source'] == 'seqp_logs']
+        calls   = sorted(seqp['call_0'].dropna().unique())
+        # Corrected logs: a third of the QSOs of one call, the other call's
+        # QSOs moved by 7 minutes.
+        d_a     = seqp[seqp['call_0'] == calls[1]].iloc[::3]
+        d_b     = seqp[seqp['call_0'] == calls[len(calls)//2]].copy()
+        d_b['datetime'] = (pd.to_datetime(d_b['datetime']) + pd.Timedelta(minutes=7)).astype(str)
+        delta   = pd.concat([d_a,d_b])
+        # Late QSOs: repeats of the first QSOs of a call 3 minutes later.
+        late    = seqp[seqp['call_0'] == calls[-2]].iloc[:5].copy()
+        late['datetime'] = (pd.to_datetime(late['datetime']) + pd.Timedelta(minutes=3)).astype(str)
+
+        inc_dir = self.score('rescore','--no-checkpoints')
+        for name, df_delta, extra in [('delta',delta,[]),('late',late,['--append'])]:
+            fpath = self.path('{!s}.csv'.format(name))
+            df_delta.to_csv(fpath,index=False)
+            run('rescore',fpath,'--input',self.csv_path,'--db-config',self.db_config,'--db-snapshot','off',
+                '--cache-dir',self.path('cache'),'--out-dir',inc_dir,'--state-dir',self.path('rescore','state'),
+                *extra)
+
+        tf      = (df['source'] == 'seqp_logs') & df['call_0'].isin(set(delta['call_0']))
+        df_full = pd.concat([df[~tf],delta,late],ignore_index=True)
+        fpath   = self.path('rescored_input.csv.bz2')
+        df_full.to_csv(fpath,index=False)
+        full_dir = self.score('full','--no-checkpoints','--no-state',input=fpath)
+        self.record('rescore',same_files(full_dir,inc_dir,tables))
+
+def main():
+    parser = argparse.ArgumentParser(description='Check that the scoring modes give the same output.')
+    parser.add_argument('--rows',type=int,default=20000)
+    parser.add_argument('--seed',type=int,default=0)
+    parser.add_argument('--data-dir',default=os.path.join(bench_dir,'data'))
+    parser.add_argument('--keep',action='store_true',help='Keep the work directory.')
+    args = parser.parse_args()
+
+    data_dir    = os.path.join(args.data_dir,'{:d}'.format(args.rows))
+    csv_path    = os.path.join(data_dir,synthetic.csv_name)
+    if not os.path.exists(csv_path):
+        print('Generating {:d} rows into {!s}...'.format(args.rows,data_dir))
+        synthetic.write_dataset(data_dir,args.rows,seed=args.seed)
+
+    work_dir    = tempfile.mkdtemp(prefix='seqp_check_')
+    db_config   = os.path.join(work_dir,'seqp_db.ini')
+    with open(db_config,'w') as fl:
+        fl.write('[hamsci_rsrch]\nbackend = sqlite\npath = {!s}\n'.format(
+            os.path.abspath(os.path.join(data_dir,synthetic.db_name))))
+    check       = Check(csv_path,db_config,work_dir)
+    try:
+        ref_dir = check.score('reference','--no-checkpoints')
+        check.modes(ref_dir)
+        check.variants()
+        check.rescore()
+    finally:
+        if args.keep:
+            print('Work directory: {!s}'.format(work_dir))
+        else:
+            shutil.rmtree(work_dir,ignore_errors=True)
+
+    failed = [mode for mode, result in check.results.items() if not all(result.values())]
+    if failed:
+        print('Output differs in: {!s}'.format(', '.join(failed)))
+        return 1
+    print('All modes give the same output.')
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
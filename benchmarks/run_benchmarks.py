@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+End-to-end benchmark of the scoring stages on synthetic data.
+
+    python benchmarks/run_benchmarks.py --scales 10000 100000 1000000
+    python benchmarks/run_benchmarks.py --compare results/OLD.json results/NEW.json
+
+For every scale a synthetic dataset (see synthetic.py) is generated once
+into benchmarks/data/<rows>/ and reused. The full scoring pipeline
+(Pipeline.run, with checkpoints off) is then run on it once, and the stages
+it records are the ones seqp-scoring --profile reports. The results are
+written to benchmarks/results/<commit>_<timestamp>.json, so runs of different
+commits can be compared with --compare.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+from collections import OrderedDict
+
+bench_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0,os.path.join(bench_dir,'..'))
+
+import pandas as pd
+
+from seqp_scoring import db, ingest
+from seqp_scoring.pipeline import Pipeline
+from seqp_scoring.profiling import StageProfiler
+import synthetic
+
+def git_commit():
+    try:
+        commit  = subprocess.check_output(['git','rev-parse','--short','HEAD'],cwd=bench_dir).decode().strip()
+        dirty   = subprocess.call(['git','diff','--quiet','HEAD'],cwd=bench_dir) != 0
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+    return commit + ('-dirty' if dirty else '')
+
+def prepare(rows,data_dir,seed):
+    """
+    Generate the dataset for `rows` if needed and build its ingest cache.
+    """
+    csv_path = os.path.join(data_dir,synthetic.csv_name)
+    if not os.path.exists(csv_path):
+        print('Generating {:d} rows into {!s}...'.format(rows,data_dir))
+        synthetic.write_dataset(data_dir,rows,seed=seed)
+    ingest.read_seqp(csv_path,columns=['source'],cache_dir=os.path.join(data_dir,'.seqp_cache'))
+    return csv_path
+
+def run_scale(csv_path,data_dir,workers=1):
+    """
+    Time one full scoring run on one dataset. The scores are written to
+    <data_dir>/out/.
+    """
+    config  = OrderedDict(db.default_config)
+    config['backend']   = 'sqlite'
+    config['path']      = os.path.join(data_dir,synthetic.db_name)
+    pipe    = Pipeline(csv_path,cache_dir=os.path.join(data_dir,'.seqp_cache'),db_config=config,
+                db_snapshot='off',checkpoints=False,workers=workers,out_dir=os.path.join(data_dir,'out'),
+                state_dir=None,verbose=False)
+    prof    = StageProfiler()
+    pipe.run(prof=prof)
+    return prof.stages
+
+def compare(old_path,new_path):
+    """
+    Print the wall time of every stage in two result files side by side.
+    """
+    with open(old_path) as fl:
+        old = json.load(fl)
+    with open(new_path) as fl:
+        new = json.load(fl)
+    print('{!s} -> {!s}'.format(old['commit'],new['commit']))
+    print('{:>10s} {:20s} {:>10s} {:>10s} {:>8s}'.format('rows','stage','old [s]','new [s]','ratio'))
+    for rows, stages in new['scales'].items():
+        old_stages = {x['stage']:x for x in old['scales'].get(rows,[])}
+        for rec in stages:
+            t_new = rec['wall_s']
+            t_old = old_stages.get(rec['stage'],{}).get('wall_s',float('nan'))
+            print('{:>10s} {:20s} {:>10.3f} {:>10.3f} {:>8.2f}'.format(rows,rec['stage'],t_old,t_new,t_new/t_old if t_old else float('nan')))
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the SEQP scoring stages on synthetic data.')
+    parser.add_argument('--scales',type=int,nargs='+',default=[10000,100000,1000000])
+    parser.add_argument('--workers',type=int,default=1)
+    parser.add_argument('--seed',type=int,default=0)
+    parser.add_argument('--data-dir',default=os.path.join(bench_dir,'data'))
+    parser.add_argument('--results-dir',default=os.path.join(bench_dir,'results'))
+    parser.add_argument('--compare',nargs=2,metavar=('OLD','NEW'),help='Compare two result files and exit.')
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    results = OrderedDict()
+    results['commit']   = git_commit()
+    results['run_at']   = datetime.datetime.now(datetime.timezone.utc).isoformat()
+    results['python']   = platform.python_version()
+    results['pandas']   = pd.__version__
+    results['machine']  = platform.machine()
+    results['cpus']     = os.cpu_count()
+    results['workers']  = args.workers
+    results['scales']   = OrderedDict()
+
+    for rows in args.scales:
+        data_dir    = os.path.join(args.data_dir,'{:d}'.format(rows))
+        csv_path    = prepare(rows,data_dir,args.seed)
+        stages      = run_scale(csv_path,data_dir,args.workers)
+        results['scales'][str(rows)] = stages
+        for rec in stages:
+            # Stages nested in another one are indented under it.
+            name = '  '+rec['stage'] if rec.get('parent') else rec['stage']
+            print('{:>10d} {:20s} {:>10.3f} s'.format(rows,name,rec['wall_s']))
+
+    os.makedirs(args.results_dir,exist_ok=True)
+    stamp   = datetime.datetime.now().strftime('%Y%m%dT%H%M%S')
+    fpath   = os.path.join(args.results_dir,'{!s}_{!s}.json'.format(results['commit'],stamp))
+    with open(fpath,'w') as fl:
+        json.dump(results,fl,indent=1)
+    print('Results written to {!s}'.format(fpath))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Synthetic SEQP data for benchmarking the scoring stages.
+
+    python benchmarks/synthetic.py 1000000 bench_data/1M
+
+writes seqp_all_ctyChecked.csv.bz2 (seqp_logs QSOs plus pskreporter, rbn,
+dxcluster and wspr spots) and hamsci_rsrch.sqlite (seqp_submissions,
+seqp_antennas, seqp_skimmers and seqp_wideband) to the output directory.
+Rows are generated and written in chunks, so sizes up to 50M rows only need
+memory for one chunk.
+
+About a third of the rows are QSOs. A fraction of them repeat an earlier
+contact on the same band and mode, half inside and half outside the 10
+minute dupe window, and a few have missing fields, short grid squares or
+modes that are not accepted. Spots cover the 8 hour window from sTime plus
+an hour on either side, and some come from the spotted station's own grid.
+"""
+import argparse
+import bz2
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0,os.path.join(os.path.dirname(os.path.abspath(__file__)),'..'))
+from seqp_scoring import bonuses, db
+
+bands       = [1, 3, 7, 14, 21, 28, 50]
+spot_bands  = bands + [5, 10, 18, 24]
+modes       = ['CW', 'PH', 'RY', 'FT', 'PK', 'JT', 'SSB', 'FT8', 'DG', 'PSK31']
+mode_probs  = [0.30, 0.30, 0.05, 0.10, 0.02, 0.03, 0.10, 0.05, 0.03, 0.02]
+sources     = ['pskreporter', 'rbn', 'dxcluster', 'wspr']
+source_probs= [0.55, 0.30, 0.10, 0.05]
+sTime       = np.datetime64('2017-08-21T14:00')
+letters     = np.array(list('ABCDEFGHIJKLMNOPQR'))
+csv_name    = 'seqp_all_ctyChecked.csv.bz2'
+db_name     = 'hamsci_rsrch.sqlite'
+
+def make_calls(n,prefix='K'):
+    """
+    Return n unique, sorted callsigns.
+    """
+    calls = ['{!s}{:d}{!s}'.format(prefix,x,letters[x % len(letters)]) for x in range(n)]
+    return np.array(sorted(calls),dtype=object)
+
+def make_grids(n,rng):
+    """
+    Return n random grid squares; about half are 6 characters long.
+    """
+    grids = np.char.add(letters[rng.integers(0,18,n)],letters[rng.integers(0,18,n)])
+    grids = np.char.add(grids,rng.integers(10,100,n).astype(str))
+    six   = rng.random(n) < 0.5
+    grids = np.where(six,np.char.add(grids,'ab'),grids)
+    return grids.astype(object)
+
+class Stations(object):
+    """
+    The SEQP participants, the other stations they work and the spotters.
+    """
+    def __init__(self,n_calls,seed=0):
+        rng             = np.random.default_rng(seed)
+        self.calls      = make_calls(n_calls)
+        self.grids      = make_grids(n_calls,rng)
+        self.single_op  = np.arange(n_calls) % 3 != 0
+        self.others     = np.concatenate([self.calls,make_calls(4*n_calls,prefix='W')])
+        self.spotters   = make_calls(max(50,n_calls//2),prefix='S')
+        self.spot_grids = make_grids(len(self.spotters),rng)
+
+def make_qsos(n_qsos,stations=None,repeat_frac=0.2,junk_frac=0.0,seed=0,sort=True):
+    """
+    Generate n_qsos seqp_logs QSOs, sorted by ['call_0','datetime'] unless
+    sort is False.
+
+    A fraction `repeat_frac` of the QSOs repeat an earlier contact on the
+    same band and mode, half of them inside the 10 minute dupe window and
+    half outside of it. A fraction `junk_frac` get a missing call_1 or mode
+    or a 2-character grid_1.
+    """
+    rng     = np.random.default_rng(seed)
+    if stations is None:
+        stations = Stations(max(10,n_qsos//300),seed)
+    n_calls = len(stations.calls)
+
+    call_0  = rng.integers(0,n_calls,n_qsos)
+    call_1  = rng.integers(0,len(stations.others),n_qsos)
+    band    = np.array(bands)[rng.integers(0,len(bands),n_qsos)]
+    mode    = np.array(modes,dtype=object)[rng.choice(len(modes),n_qsos,p=mode_probs)]
+    secs    = rng.integers(0,8*3600,n_qsos)
+
+    n_rep   = int(n_qsos*repeat_frac)
+    src     = rng.integers(0,n_qsos,n_rep)
+    dst     = rng.integers(0,n_qsos,n_rep)
+    call_0[dst] = call_0[src]
+    call_1[dst] = call_1[src]
+    band[dst]   = band[src]
+    mode[dst]   = mode[src]
+    inside      = rng.random(n_rep) < 0.5
+    secs[dst]   = secs[src] + np.where(inside,rng.integers(0,600,n_rep),rng.integers(600,3600,n_rep))
+
+    df = pd.DataFrame({
+        'datetime'  : sTime + secs.astype('timedelta64[s]'),
+        'call_0'    : stations.calls[call_0],
+        'call_1'    : stations.others[call_1],
+        'grid_0'    : stations.grids[call_0],
+        'grid_1'    : make_grids(n_qsos,rng),
+        'band'      : band,
+        'mode'      : mode,
+        'source'    : 'seqp_logs',
+        'single_op' : stations.single_op[call_0],
+        })
+
+    if junk_frac > 0:
+        junk    = np.flatnonzero(rng.random(n_qsos) < junk_frac)
+        kind    = rng.integers(0,3,len(junk))
+        df.loc[junk[kind == 0],'call_1']    = np.nan
+        df.loc[junk[kind == 1],'mode']      = np.nan
+        df.loc[junk[kind == 2],'grid_1']    = 'FN'
+
+    if sort:
+        df = df.sort_values(by = ['call_0','datetime']).reset_index(drop = True)
+    return df
+
+def make_spots(n_spots,stations,own_grid_frac=0.1,seed=0):
+    """
+    Generate n_spots pskreporter/rbn/dxcluster/wspr spots of the SEQP calls
+    and their contacts, from 1 hour before to 1 hour after the 8 hour
+    window. A fraction `own_grid_frac` are spotted from the station's own
+    4-character grid square.
+    """
+    rng     = np.random.default_rng(seed)
+    n_calls = len(stations.calls)
+    call_1  = rng.integers(0,2*n_calls,n_spots)
+    spotter = rng.integers(0,len(stations.spotters),n_spots)
+    grid_0  = stations.spot_grids[spotter].copy()
+
+    own     = np.flatnonzero(np.logical_and(rng.random(n_spots) < own_grid_frac,call_1 < n_calls))
+    grid_0[own] = [x[:4] for x in stations.grids[call_1[own]]]
+
+    secs    = rng.integers(-3600,9*3600,n_spots)
+    df = pd.DataFrame({
+        'datetime'  : sTime + secs.astype('timedelta64[s]'),
+        'call_0'    : stations.spotters[spotter],
+        'call_1'    : stations.others[call_1],
+        'grid_0'    : grid_0,
+        'grid_1'    : 'AA00',
+        'band'      : np.array(spot_bands)[rng.integers(0,len(spot_bands),n_spots)],
+        'mode'      : np.array(modes,dtype=object)[rng.integers(0,len(modes),n_spots)],
+        'source'    : np.array(sources,dtype=object)[rng.choice(len(sources),n_spots,p=source_probs)],
+        'single_op' : np.nan,
+        })
+    return df
+
+def make_submissions(dbc,stations,seed=0):
+    """
+    Fill the seqp_* tables of a SQLite stand-in: most calls submit once, some
+    twice, with 0-3 antennas and 0-1 skimmers and wideband recordings each.
+    """
+    rng     = np.random.default_rng(seed)
+    subs, ants, skims, wbs = [], [], [], []
+    sid     = 0
+    for inx, call in enumerate(stations.calls):
+        if rng.random() < 0.15:
+            continue
+        for rep in range(1 + int(rng.random() < 0.1)):
+            sid     += 1
+            callsign = call.lower() if rng.random() < 0.2 else call
+            dsn      = 'station.pdf' if rng.random() < 0.4 else None
+            subs.append((sid,callsign,stations.grids[inx],float(rng.choice([-1,0,5,15])),
+                dsn,None if dsn is None else b'%PDF-1.4 synthetic','log.txt',b'QSO: synthetic'))
+            for x in range(rng.integers(0,4)):
+                ants.append((sid,)+tuple(int(y) for y in rng.integers(0,2,len(bonuses.an_bands)))
+                    +(str(rng.choice(['100','0','','5.5','n/a'])),))
+            for x in range(rng.integers(0,2)):
+                skims.append((sid,'CW')+tuple(int(y) for y in rng.integers(0,2,len(bonuses.sk_bands))))
+            for x in range(rng.integers(0,2)):
+                wbs.append((sid,'10.5281/zenodo.0')+tuple(int(y) for y in rng.integers(0,2,len(bonuses.wb_bands))))
+
+    def insert(table,keys,rows):
+        qry = 'INSERT INTO {!s} ({!s}) VALUES ({!s})'.format(table,', '.join(keys),', '.join(['?']*len(keys)))
+        dbc.executemany(qry,rows)
+
+    insert('seqp_submissions',['submitter_id','callsign','per_gs','ground_conductivity',
+        'dsn_fname','submitted_dsn','log_fname','submitted_log'],subs)
+    insert('seqp_antennas',['submitter_id']+bonuses.has_columns(bonuses.an_bands)+['erp'],ants)
+    insert('seqp_skimmers',['submitter_id','mode']+bonuses.has_columns(bonuses.sk_bands),skims)
+    insert('seqp_wideband',['submitter_id','doi']+bonuses.has_columns(bonuses.wb_bands),wbs)
+    dbc.commit()
+
+def write_dataset(out_dir,n_rows,qso_frac=1/3.,chunk_size=1000000,seed=0):
+    """
+    Write a synthetic seqp_all_ctyChecked.csv.bz2 with n_rows rows and a
+    matching hamsci_rsrch.sqlite into out_dir. Returns the Stations.
+    """
+    os.makedirs(out_dir,exist_ok=True)
+    n_qsos      = int(n_rows*qso_frac)
+    stations    = Stations(max(10,n_qsos//300),seed)
+
+    csv_path    = os.path.join(out_dir,csv_name)
+    n_chunks    = max(1,int(np.ceil(n_rows/float(chunk_size))))
+    with bz2.open(csv_path,'wt') as fl:
+        for inx in range(n_chunks):
+            n_q = n_qsos//n_chunks + (inx < n_qsos % n_chunks)
+            n_s = (n_rows-n_qsos)//n_chunks + (inx < (n_rows-n_qsos) % n_chunks)
+            df  = pd.concat([make_qsos(n_q,stations,junk_frac=0.02,seed=seed+2*inx+1,sort=False),
+                             make_spots(n_s,stations,seed=seed+2*inx+2)])
+            df.to_csv(fl,index=False,header=(inx == 0))
+
+    db_path     = os.path.join(out_dir,db_name)
+    if os.path.exists(db_path):
+        os.remove(db_path)
+    dbc         = db.connect_sqlite(db_path)
+    make_submissions(dbc,stations,seed)
+    dbc.close()
+    return stations
+
+def main():
+    parser = argparse.ArgumentParser(description='Write a synthetic SEQP dataset.')
+    parser.add_argument('rows',type=int,help='Total rows (QSOs and spots).')
+    parser.add_argument('out_dir')
+    parser.add_argument('--chunk-size',type=int,default=1000000)
+    parser.add_argument('--seed',type=int,default=0)
+    args = parser.parse_args()
+    write_dataset(args.out_dir,args.rows,chunk_size=args.chunk_size,seed=args.seed)
+
+if __name__ == '__main__':
+    main()
@@ -1,11 +1,7 @@
 #!/usr/bin/env python3
 
-import mysql.connector
-user        = 'hamsci'
-password    = 'hamsci'
-host        = 'localhost'
-database    = 'hamsci_rsrch'
-db          = mysql.connector.connect(user=user,password=password,host=host,database=database,buffered=True)
+from seqp_scoring.db import connect, query
+db          = connect()
 
 #mysql> describe seqp_submissions;                                                                     
 #+---------------------+---------------------+------+-----+-------------------+----------------+
@@ -37,9 +33,7 @@ db          = mysql.connector.connect(user=user,password=password,host=host,data
 
 qry     = ("SELECT callsign,ground_conductivity FROM seqp_submissions ")
            
-crsr    = db.cursor()
-crsr.execute(qry)
-results = crsr.fetchall()
-crsr.close()
+results = query(db,qry)
+db.close()
 for result in results:
     print(result)
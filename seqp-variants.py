@@ -0,0 +1,17 @@
+#!/usr/bin/env python3
+"""
+Score the SEQP under several variants of the rules in one pass.
+
+    ./seqp-variants.py --variants variants.json
+
+variants.json is a list of rule changes (see seqp_scoring/rules.py). The
+published rules are always scored first as the base. One score table per
+variant and a ranking-diff report against the base are written to
+--out-dir. Same as `seqp-scoring variants` (see seqp_scoring/cli.py).
+"""
+import sys
+
+from seqp_scoring.cli import main
+
+if __name__ == '__main__':
+    sys.exit(main(['variants'] + sys.argv[1:]))
@@ -0,0 +1,3 @@
+"""
+Scoring stages for the Solar Eclipse QSO Party (SEQP).
+"""
@@ -0,0 +1,8 @@
+"""
+python -m seqp_scoring: the seqp-scoring command line (see cli.py).
+"""
+import sys
+
+from .cli import main
+
+sys.exit(main())
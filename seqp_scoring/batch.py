@@ -0,0 +1,183 @@
+"""
+Batched what-if scoring: score many RuleSet variants in one pass.
+
+Ingest, sorting, the call index, the required-field and grid filters, the
+dupe grouping, the per-call mode counts, the submission bonuses and the spot
+selection are done once and shared by every variant. Each piece is keyed by
+only the rules it depends on, so K variants that differ in, say, QSO points
+share all of the QSO work and only redo the final arithmetic:
+
+    dupe grouping:      valid modes, bands
+    dupe flags:         + dupe window
+    QSO counts, grids:  + dupe window (counts per mode, split per variant)
+    spot bins:          sTime, spot hours, bands, sources
+    bonuses 4-8:        computed once at 1 point each, scaled per variant
+
+ranking_diff() compares the rankings of the variants with the first one.
+"""
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from .bonuses import submission_bonuses
+from .dupes import dupe_gaps, flag_dupes
+from .filters import FilterPipeline
+from .scoring import grid_multipliers, score_columns, totals
+from .spots import bin_spots, spot_bonus
+
+call_columns    = ['call','single_op','grid','qsos_submitted']
+
+class BatchScorer(object):
+    """
+    Shared state for scoring variants of the rules over one dataset.
+
+    df_seqp:    seqp_logs QSOs sorted by ['call_0','datetime'].
+    df_calls:   the call table (see scoring.call_table).
+    df_sub:     submissions (see bonuses.build_submissions); no bonuses 4-8
+                if None.
+    df:         the full input, for the spot bonus; no spot bonus if None.
+    """
+    def __init__(self,df_seqp,df_calls,df_sub=None,df=None):
+        self.df_seqp    = df_seqp
+        self.df_calls   = df_calls[call_columns].reset_index(drop=True)
+        self.calls      = pd.Index(self.df_calls['call'])
+        self.base_mask  = FilterPipeline(df_seqp).required().grid_length().mask
+        self.cache      = {}
+
+        self.unit_bonus = None
+        if df_sub is not None:
+            ones            = OrderedDict((x,1) for x in ['ground_conductivity','antenna_design','erpd','skimmers','iq_data'])
+            self.unit_bonus = submission_bonuses(df_sub,self.calls,ones)
+
+        # Spot candidates: the filtered spots of scored calls, any band/source.
+        self.df_spots   = None
+        if df is not None:
+            spot_mask       = FilterPipeline(df).required().grid_length().mask
+            tf              = np.logical_and(spot_mask,df['call_1'].isin(self.calls).values)
+            self.df_spots   = df[tf]
+
+    def cached(self,key,func):
+        if key not in self.cache:
+            self.cache[key] = func()
+        return self.cache[key]
+
+    def gaps(self,rules):
+        modes   = tuple(sorted(rules.valid_modes))
+        bands   = tuple(rules.bands)
+        def func():
+            mask = np.logical_and(self.base_mask,self.df_seqp['mode'].isin(modes).values)
+            return mask, dupe_gaps(self.df_seqp,self.calls,bands,modes,mask=mask)
+        return self.cached(('gaps',modes,bands),func)
+
+    def qsos(self,rules):
+        """
+        Dupe counts, valid QSO counts per (call, mode) and grid squares per
+        band for the validity rules of `rules`.
+        """
+        key = ('qsos',tuple(sorted(rules.valid_modes)),tuple(rules.bands),rules.dupe_window)
+        def func():
+            mask, gaps  = self.gaps(rules)
+            dupe, dupes = flag_dupes(self.df_seqp,gaps,self.calls,rules.dupe_window)
+            dft         = self.df_seqp[np.logical_and(mask,np.logical_not(dupe.values))]
+            counts      = dft.groupby(['call_0','mode'],observed=True).size().unstack(fill_value=0)
+            counts      = counts.reindex(index=self.calls,fill_value=0)
+            counts.columns  = counts.columns.astype(object)
+            gs          = grid_multipliers(dft,self.calls,rules.bands)
+            return dupes, counts, gs
+        return self.cached(key,func)
+
+    def spots(self,rules,grids):
+        key = ('spots',rules.sTime,rules.spot_hours,tuple(rules.bands),tuple(rules.sources))
+        def func():
+            df_bin = bin_spots(self.df_spots,rules.sTime,self.calls,rules.bands,rules.sources,hours=rules.spot_hours)
+            return spot_bonus(df_bin,self.calls,grids,rules.sources)
+        return self.cached(key,func)
+
+    def score(self,rules):
+        """
+        The seqp_scores.csv table of one rule set.
+        """
+        dupes, counts, gs = self.qsos(rules)
+        df_out  = self.df_calls.set_index('call',drop=False)
+        df_out['dupes']         = dupes.values
+
+        def n_qsos(modes):
+            return counts.reindex(columns=modes,fill_value=0).sum(axis=1).astype(int)
+        df_out['ph_qso']            = n_qsos(rules.ph_modes)
+        df_out['cw_dig_qso']        = n_qsos(rules.cw_modes)
+        df_out['ph_qso_pts']        = df_out['ph_qso']*rules.ph_points
+        df_out['cw_dig_qso_pts']    = df_out['cw_dig_qso']*rules.cw_points
+        df_out['total_qso_pts']     = df_out['ph_qso_pts'] + df_out['cw_dig_qso_pts']
+        df_out  = df_out.join(gs)
+
+        for key in ['operated_totality','operated_outdoors','operated_public']:
+            df_out[key] = rules.operated_bonus
+        for key, val in rules.bonus_values.items():
+            df_out[key] = 0 if self.unit_bonus is None else self.unit_bonus[key]*val
+        if self.df_spots is None:
+            for key in rules.sources:
+                df_out[key] = 0
+        else:
+            df_out  = df_out.join(self.spots(rules,self.df_calls['grid'].values))
+
+        df_out  = totals(df_out.reset_index(drop=True),rules.bands,rules.sources)
+        return df_out[score_columns(rules.bands,rules.sources)].copy()
+
+def evaluate(rulesets,df_seqp,df_calls,df_sub=None,df=None):
+    """
+    Score every RuleSet in `rulesets` with shared work. Returns an
+    OrderedDict of rule set name -> score table.
+    """
+    scorer  = BatchScorer(df_seqp,df_calls,df_sub,df)
+    tables  = OrderedDict()
+    for rules in rulesets:
+        tables[rules.name] = scorer.score(rules)
+    return tables
+
+def ranks(df_out):
+    """
+    Competition ranking (1 = highest total; ties share the best rank).
+    """
+    totals_ = df_out.set_index('call')['total']
+    return totals_, totals_.rank(ascending=False,method='min').astype(int)
+
+def ranking_diff(tables,top=10):
+    """
+    Compare the ranking of every variant with the first table.
+
+    Returns (df_diff, df_summary):
+        df_diff:    one row per variant and call whose total or rank changed.
+        df_summary: per variant, the number of calls whose total and rank
+                    changed, the largest rank move, whether the top `top`
+                    calls are unchanged and the Spearman rank correlation.
+    """
+    names           = list(tables.keys())
+    total_0, rank_0 = ranks(tables[names[0]])
+    diffs, rows     = [], []
+    for name in names[1:]:
+        total, rank = ranks(tables[name])
+        total       = total.reindex(total_0.index)
+        rank        = rank.reindex(total_0.index)
+        df          = pd.DataFrame({'total_base':total_0,'total':total,
+                        'total_change':total-total_0,'rank_base':rank_0,'rank':rank,
+                        'rank_change':rank_0-rank})
+        df.insert(0,'variant',name)
+        changed     = np.logical_or(df['total_change'] != 0,df['rank_change'] != 0)
+        diffs.append(df[changed].sort_values(['rank','rank_base']))
+
+        row = OrderedDict()
+        row['variant']          = name
+        row['totals_changed']   = int((df['total_change'] != 0).sum())
+        row['ranks_changed']    = int((df['rank_change'] != 0).sum())
+        row['max_rank_change']  = int(df['rank_change'].abs().max()) if len(df) else 0
+        row['top_{:d}_same'.format(top)] = list(rank_0.sort_values(kind='stable').index[:top]) == \
+                                           list(rank.sort_values(kind='stable').index[:top])
+        # Spearman: Pearson correlation of the (average) ranks, without scipy.
+        row['spearman']         = rank_0.rank().corr(rank.rank()) if len(df) > 1 else 1.
+        rows.append(row)
+
+    df_diff     = pd.concat(diffs) if diffs else pd.DataFrame()
+    df_diff.index.name = 'call'
+    df_summary  = pd.DataFrame(rows,columns=None if rows else ['variant'])
+    return df_diff, df_summary
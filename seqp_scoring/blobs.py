@@ -0,0 +1,110 @@
+"""
+Writing database blobs (PDFs, logs) to files.
+
+A manifest of SHA-1 checksums in the output directory remembers what was
+written on the last run, so files whose content has not changed are not
+written again, and files that are no longer produced are removed instead of
+wiping the whole directory. If the database can compute the checksum of a
+blob (see db.connect_sqlite for SQLite), keep() skips an unchanged file
+without fetching its blob at all.
+"""
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+manifest_name = '.manifest.json'
+
+class BlobWriter(object):
+    """
+    Write blobs into out_dir from a small thread pool.
+
+    At most `max_pending` blobs are held in memory waiting to be written, so
+    peak memory depends on the largest blobs, not on how many there are.
+    Writes to the same file name happen in the order they were submitted.
+
+        with BlobWriter('antenna_pdfs') as writer:
+            writer.write(fname,data)
+    """
+    def __init__(self,out_dir,threads=4,max_pending=None):
+        self.out_dir    = out_dir
+        self.mpath      = os.path.join(out_dir,manifest_name)
+        self.manifest   = {}
+        os.makedirs(out_dir,exist_ok=True)
+        if os.path.exists(self.mpath):
+            with open(self.mpath) as fl:
+                self.manifest = json.load(fl)
+
+        self.pool       = ThreadPoolExecutor(max_workers=threads)
+        self.pending    = threading.BoundedSemaphore(max_pending or 2*threads)
+        self.futures    = {}
+        self.written    = {}
+        self.lock       = threading.Lock()
+        self.skipped    = 0
+
+    def unchanged(self,fname,sha1):
+        fpath = os.path.join(self.out_dir,fname)
+        return self.manifest.get(fname) == sha1 and os.path.exists(fpath)
+
+    def keep(self,fname,sha1):
+        """
+        Keep out_dir/fname from the last run if its content has the SHA-1
+        checksum `sha1`. Returns False if it has to be written again.
+        """
+        if not self.unchanged(fname,sha1):
+            return False
+        with self.lock:
+            self.written[fname] = sha1
+            self.skipped += 1
+        return True
+
+    def _write(self,fname,data,previous):
+        try:
+            if previous is not None:
+                previous.result()
+            sha1 = hashlib.sha1(data).hexdigest()
+            if self.unchanged(fname,sha1):
+                with self.lock:
+                    self.skipped += 1
+            else:
+                fpath = os.path.join(self.out_dir,fname)
+                with open(fpath+'.tmp','wb') as fl:
+                    fl.write(data)
+                os.replace(fpath+'.tmp',fpath)
+            with self.lock:
+                self.written[fname] = sha1
+        finally:
+            self.pending.release()
+
+    def write(self,fname,data):
+        """
+        Queue `data` to be written to out_dir/fname unless it is unchanged.
+        """
+        self.pending.acquire()
+        previous = self.futures.get(fname)
+        self.futures[fname] = self.pool.submit(self._write,fname,data,previous)
+
+    def close(self,prune=True):
+        """
+        Wait for all writes, remove files from the last run that were not
+        written this time (if prune) and save the manifest.
+        """
+        self.pool.shutdown(wait=True)
+        for future in self.futures.values():
+            future.result()
+        if prune:
+            for fname in set(self.manifest) - set(self.written):
+                fpath = os.path.join(self.out_dir,fname)
+                if os.path.exists(fpath):
+                    os.remove(fpath)
+        self.manifest = self.written
+        with open(self.mpath+'.tmp','w') as fl:
+            json.dump(self.manifest,fl,indent=1,sort_keys=True)
+        os.replace(self.mpath+'.tmp',self.mpath)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self,exc_type,exc_value,traceback):
+        self.close(prune=exc_type is None)
@@ -0,0 +1,122 @@
+"""
+Submission bonuses (BONUS 4-8) from the seqp_* tables of hamsci_rsrch.
+"""
+from collections import OrderedDict
+
+import pandas as pd
+
+from .db import read_frame
+
+an_bands    = [160, 80, 40, 20, 15, 10, 6]
+sk_bands    = [160, 80, 60, 40, 30, 20, 17, 15, 12, 10, 6]
+wb_bands    = sk_bands
+
+# Points per bonus: flat for ground_conductivity and antenna_design, per band
+# for erpd, skimmers and iq_data.
+bonus_values = OrderedDict()
+bonus_values['ground_conductivity'] = 50
+bonus_values['antenna_design']      = 100
+bonus_values['erpd']                = 50
+bonus_values['skimmers']            = 50
+bonus_values['iq_data']             = 50
+
+def clean_call(call):
+    if not pd.isnull(call):
+        call = call.replace('/','-').upper()
+    return call
+
+def has_columns(bands):
+    return ['has_{:d}'.format(x) for x in bands]
+
+def sum_bands(df,df_sub,prefix,bands):
+    """
+    Sum the has_<band> flags of df per submitter_id and return them as
+    <prefix>_has_<band> columns aligned with df_sub.
+    """
+    keys    = has_columns(bands)
+    sums    = df.groupby('submitter_id')[keys].sum()
+    # Sums of an empty or all-NULL table are objects; make them numbers
+    # before filling in the submitters without rows.
+    sums    = sums.reindex(df_sub['submitter_id']).apply(pd.to_numeric,errors='coerce').fillna(0).astype(int)
+    sums.columns = ['{!s}_{!s}'.format(prefix,x) for x in keys]
+    return sums.reset_index(drop=True)
+
+def fetch_tables(db):
+    """
+    Read the columns of the seqp_* tables that df_sub is built from, with
+    four bulk queries, one per table, no matter how many submitters there
+    are. Returns an OrderedDict of table name -> DataFrame.
+    """
+    tables  = OrderedDict()
+    tables['seqp_submissions']  = read_frame(db,'SELECT submitter_id, callsign, ground_conductivity, dsn_fname FROM seqp_submissions ORDER BY submitter_id')
+    tables['seqp_antennas']     = read_frame(db,'SELECT submitter_id, {!s}, erp FROM seqp_antennas'.format(', '.join(has_columns(an_bands))))
+    tables['seqp_skimmers']     = read_frame(db,'SELECT submitter_id, mode, {!s} FROM seqp_skimmers'.format(', '.join(has_columns(sk_bands))))
+    tables['seqp_wideband']     = read_frame(db,'SELECT submitter_id, doi, {!s} FROM seqp_wideband'.format(', '.join(has_columns(wb_bands))))
+    return tables
+
+def build_submissions(tables):
+    """
+    Build df_sub from the tables returned by fetch_tables().
+
+    Each row is one submission (in submitter_id order) with the cleaned call,
+    ground conductivity (g_con), dsn_fname and the per-band an_/sk_/wb_has_*
+    sums of its antennas, skimmers and wideband recordings. Only antennas
+    with an ERP greater than zero are counted.
+    """
+    df_sub  = tables['seqp_submissions']
+    df_an   = tables['seqp_antennas']
+    df_sk   = tables['seqp_skimmers']
+    df_wb   = tables['seqp_wideband']
+
+    # BONUS 6 only counts antennas with a submitted ERPD greater than 0.
+    df_an   = df_an[pd.to_numeric(df_an['erp'],errors='coerce') > 0]
+
+    df_sub  = df_sub.rename(columns={'ground_conductivity':'g_con'})
+    df_sub.insert(1,'call',df_sub.pop('callsign').map(clean_call))
+    df_sub  = pd.concat([df_sub,
+                sum_bands(df_an,df_sub,'an',an_bands),
+                sum_bands(df_sk,df_sub,'sk',sk_bands),
+                sum_bands(df_wb,df_sub,'wb',wb_bands)],axis=1)
+    return df_sub
+
+def fetch_submissions(db):
+    """
+    Build df_sub straight from the database (see build_submissions).
+    """
+    return build_submissions(fetch_tables(db))
+
+def submission_bonuses(df_sub,calls,values=bonus_values):
+    """
+    Compute BONUS 4-8 for every call in `calls` with one keyed join on the
+    cleaned callsign.
+
+    A call may have several submissions. They resolve the same way the old
+    nested loop over df_sub did, in df_sub (submitter_id) order:
+        ground_conductivity, antenna_design: awarded if any submission for
+            the call qualifies.
+        erpd, skimmers, iq_data: taken from the last submission for the call
+            (last match wins).
+
+    `values` holds the points of each bonus. Returns a DataFrame indexed by
+    `calls`.
+    """
+    def n_bands(prefix,bands):
+        keys = ['{!s}_{!s}'.format(prefix,x) for x in has_columns(bands)]
+        return (df_sub[keys] != 0).sum(axis=1)
+
+    df = pd.DataFrame({'call':df_sub['call']})
+    df['ground_conductivity']   = (pd.to_numeric(df_sub['g_con'],errors='coerce') > 0) * values['ground_conductivity']
+    df['antenna_design']        = df_sub['dsn_fname'].notnull() * values['antenna_design']
+    df['erpd']                  = n_bands('an',an_bands) * values['erpd']
+    df['skimmers']              = n_bands('sk',sk_bands) * values['skimmers']
+    df['iq_data']               = n_bands('wb',wb_bands) * values['iq_data']
+
+    aggs = OrderedDict()
+    aggs['ground_conductivity'] = 'max'
+    aggs['antenna_design']      = 'max'
+    aggs['erpd']                = 'last'
+    aggs['skimmers']            = 'last'
+    aggs['iq_data']             = 'last'
+    df_bonus = df.groupby('call',sort=False).agg(aggs)
+    df_bonus = df_bonus.reindex(calls).apply(pd.to_numeric,errors='coerce').fillna(0).astype(int)
+    return df_bonus
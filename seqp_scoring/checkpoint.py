@@ -0,0 +1,102 @@
+"""
+Content-addressed checkpoints of the scoring stages.
+
+Every stage output is saved under a key that hashes the stage name, the keys
+of the stages it reads from and the rule parameters it depends on. Keys are
+chained, so changing a rule (say the dupe window) changes the key of the
+stage that uses it and of every stage downstream of it, while the upstream
+stages are loaded from their checkpoints. The root key is the SHA-1 of the
+input CSV (see defaults.source_key), and every key also covers the source code
+of this package but rules.py, so editing a stage invalidates its checkpoints.
+
+Checkpoints are pickles in the checkpoint directory, named
+<stage>-<key>.pkl. Old checkpoints are kept, so switching back to an earlier
+rule set is also a cache hit; delete the directory to reclaim the space.
+"""
+import glob
+import hashlib
+import json
+import os
+
+import pandas as pd
+
+from .defaults import checkpoint_dir
+
+# The rule values are hashed into the key of every stage that uses them (see
+# RuleSet.params), so editing them only reruns those stages.
+code_exclude    = ['rules.py']
+
+def code_key(paths=None):
+    """
+    SHA-1 of the source files of this package but code_exclude (and any
+    extra `paths`).
+    """
+    here    = os.path.dirname(os.path.abspath(__file__))
+    fpaths  = sorted(glob.glob(os.path.join(here,'*.py')))
+    fpaths  = [x for x in fpaths if os.path.basename(x) not in code_exclude]
+    if paths is not None:
+        fpaths += list(paths)
+    sha     = hashlib.sha1()
+    for fpath in fpaths:
+        sha.update(os.path.basename(fpath).encode())
+        with open(fpath,'rb') as fl:
+            sha.update(fl.read())
+    return sha.hexdigest()
+
+class Checkpoints(object):
+    """
+    Load-or-compute store of stage outputs.
+
+    ckpt    = Checkpoints(checkpoint_dir)
+    k_seqp  = ckpt.key('seqp',source_sha1)
+    df_seqp = ckpt.run('seqp',k_seqp,lambda: read_and_sort())
+    k_score = ckpt.key('score',k_seqp,cw_modes=cw_modes,window='10min')
+    """
+    def __init__(self,path=checkpoint_dir,enabled=True,code=None):
+        self.path       = path
+        self.enabled    = enabled
+        self.code       = code_key() if code is None else code
+        self.hits       = []
+        self.misses     = []
+        if enabled:
+            os.makedirs(path,exist_ok=True)
+
+    def key(self,name,*parents,**params):
+        """
+        Key of stage `name` from the keys of its parents and its rule
+        parameters. Parameters must be JSON serializable (lists, numbers,
+        strings); anything else is hashed through str().
+        """
+        blob    = json.dumps([name,self.code,list(parents),params],sort_keys=True,default=str)
+        return hashlib.sha1(blob.encode()).hexdigest()
+
+    def fpath(self,name,key):
+        return os.path.join(self.path,'{!s}-{!s}.pkl'.format(name,key))
+
+    def run(self,name,key,func,outputs=(),prof=None,rows_in=None,rows_out=None):
+        """
+        Return the checkpointed output of stage `name` under `key`, or
+        compute it with func() and save it. A stage with side effects lists
+        the files it writes in `outputs`; it is rerun if any of them is
+        missing.
+
+        With `prof` (a StageProfiler) the stage is recorded under `name`
+        with checkpoint_hit set, and rows_out(result) as its output rows.
+        """
+        fpath   = self.fpath(name,key)
+        hit     = self.enabled and os.path.exists(fpath) and all(os.path.exists(x) for x in outputs)
+        if prof is not None:
+            st  = prof.start(name,rows_in=rows_in)
+            st['checkpoint_hit'] = hit
+        if hit:
+            self.hits.append(name)
+            result  = pd.read_pickle(fpath)
+        else:
+            self.misses.append(name)
+            result  = func()
+            if self.enabled:
+                pd.to_pickle(result,fpath+'.tmp')
+                os.replace(fpath+'.tmp',fpath)
+        if prof is not None:
+            prof.stop(st,rows_out=None if rows_out is None else rows_out(result))
+        return result
@@ -0,0 +1,86 @@
+"""
+Out-of-core ingest: stream the SEQP CSV in bounded chunks.
+
+The in-memory path keeps every spot row of the input in `df` next to
+df_seqp. Here the CSV is read `chunk_size` rows at a time instead:
+    - seqp_logs rows are kept (they are a small part of the input) and
+      become df_seqp at the end.
+    - spot rows are filtered (required fields, grid length), binned to
+      (source, call_1, band, hour, grid_0_4char) with bin_spots and only the
+      distinct tuples are kept, which is all BONUS 9 needs.
+Peak memory is one chunk plus the QSOs plus the distinct spot tuples, no
+matter how many spots the input holds.
+
+The column dtypes of the full read are reproduced: every chunk's dtypes are
+recorded and df_seqp is cast to the dtype pandas would have inferred for the
+whole file, so the scores and the per-mode files match the in-memory run.
+"""
+from collections import OrderedDict
+
+import pandas as pd
+
+from . import encoding
+from .filters import FilterPipeline
+from .ingest import common_dtype
+from .spots import bin_spots, spot_bonus, spot_sources, spot_hours
+
+chunk_size  = 1000000
+bin_keys    = ['source','call_1','band','hour','grid_0_4char']
+
+class SpotBins(object):
+    """
+    Distinct binned spot tuples, accumulated chunk by chunk.
+    """
+    def __init__(self,sTime,bands,sources=spot_sources,hours=spot_hours):
+        self.sTime      = sTime
+        self.bands      = bands
+        self.sources    = sources
+        self.hours      = hours
+        self.bins       = None
+        self.rows_in    = 0
+
+    def add(self,df_spots):
+        df_spots    = encoding.encode(df_spots)
+        mask        = FilterPipeline(df_spots).required().grid_length().mask
+        df_bin      = bin_spots(df_spots,self.sTime,None,self.bands,self.sources,hours=self.hours,mask=mask)
+        df_bin      = df_bin.astype({x:object for x in ['source','call_1','grid_0_4char']})
+        if self.bins is not None:
+            df_bin  = pd.concat([self.bins,df_bin],ignore_index=True)
+        self.bins   = df_bin.drop_duplicates(bin_keys,ignore_index=True)
+        self.rows_in += len(df_spots)
+
+    def bonus(self,calls,grids):
+        """
+        BONUS 9 for `calls` (see spots.spot_bonus).
+        """
+        df_bin = self.bins
+        if df_bin is None:
+            df_bin = pd.DataFrame(columns=bin_keys)
+        df_bin = df_bin[df_bin['call_1'].isin(calls)]
+        return spot_bonus(df_bin,calls,grids,self.sources)
+
+def scan(path,sTime,bands,sources=spot_sources,hours=spot_hours,chunk_size=chunk_size,verbose=True):
+    """
+    Stream the CSV at `path` once. Returns (df_seqp, spots): the encoded,
+    unsorted seqp_logs rows and the SpotBins of every spot row. Progress is
+    printed after every chunk if `verbose`.
+    """
+    spots   = SpotBins(sTime,bands,sources,hours)
+    parts   = []
+    dtypes  = OrderedDict()
+    for chunk in pd.read_csv(path,parse_dates=['datetime'],chunksize=chunk_size):
+        for key, dtype in chunk.dtypes.items():
+            dtypes.setdefault(key,[]).append(dtype)
+        tf  = (chunk['source'] == 'seqp_logs').values
+        if tf.any() or len(parts) == 0:
+            parts.append(chunk[tf])
+        spots.add(chunk[~tf].copy())
+        if verbose:
+            print('  --> {:d} spots scanned, {:d} distinct spot bins'.format(spots.rows_in,len(spots.bins)))
+
+    df_seqp = pd.concat(parts,ignore_index=True)
+    for key, dtype_list in dtypes.items():
+        dtype = common_dtype(dtype_list)
+        if df_seqp[key].dtype != dtype:
+            df_seqp[key] = df_seqp[key].astype(dtype)
+    return encoding.encode(df_seqp), spots
@@ -0,0 +1,304 @@
+"""
+The seqp-scoring command line.
+
+    seqp-scoring score [options]        score the SEQP (see pipeline.Pipeline)
+    seqp-scoring rescore DELTA          rescore the calls of late or corrected logs
+    seqp-scoring call CALL [CALL ...]   score a few calls, nothing is written
+    seqp-scoring modes                  QSOs submitted per mode
+    seqp-scoring variants --variants F  score rule variants (see batch.py)
+
+main() returns an exit code instead of exiting: 0 on success, 1 on an error,
+2 on a usage error and 3 from `score --strict` if the per-call counts do not
+reconcile. It is installed as the seqp-scoring console script, and
+`python -m seqp_scoring` runs it too.
+
+Only the standard library is imported up front; each command imports the
+modules it needs when it runs, so `--help` and `modes` (on a built cache)
+start without loading pandas.
+"""
+import argparse
+import contextlib
+import os
+import sys
+import time
+
+from .defaults import cache_dir, cache_path, checkpoint_dir, csv_path, mode_formats, snapshot_modes, state_dir
+
+prog    = 'seqp-scoring'
+
+def add_input_args(parser):
+    parser.add_argument('--input',default=csv_path,help='SEQP CSV (default: %(default)s)')
+    parser.add_argument('--cache-dir',default=cache_dir,help='Columnar cache directory (default: %(default)s)')
+    parser.add_argument('--no-cache',action='store_true',help='Always parse the CSV instead of using the cache.')
+
+def add_db_args(parser):
+    parser.add_argument('--db-config',help='hamsci_rsrch database config (default: see seqp_scoring/db.py)')
+    parser.add_argument('--db-snapshot',default='auto',choices=snapshot_modes,
+            help='Reuse a local snapshot of the bonus tables: auto (if unchanged), offline (no database), '
+                 'refresh or off (default: %(default)s)')
+
+def add_rules_arg(parser):
+    parser.add_argument('--rules',
+            help='JSON rule set to score under instead of the published rules (see seqp_scoring/rules.py)')
+
+def load_rules(args):
+    """
+    The RuleSet of --rules, or None for the published rules.
+    """
+    if args.rules is None:
+        return None
+    from .rules import load_ruleset
+    return load_ruleset(args.rules)
+
+# -----------------------------------------------------------------------------
+# Commands.
+# -----------------------------------------------------------------------------
+
+def score(args):
+    """
+    Score every call (seqp-scoring.py).
+    """
+    from .pipeline import Pipeline, discrepancy_path
+    pipeline = Pipeline(args.input,rules=load_rules(args),cache_dir=args.cache_dir,use_cache=not args.no_cache,
+            db_config=args.db_config,db_snapshot=args.db_snapshot,
+            checkpoint_dir=args.checkpoint_dir,checkpoints=not args.no_checkpoints,
+            chunk_size=args.chunk_size,workers=args.workers,mode_format=args.mode_format,
+            export_threads=args.export_threads,out_dir=args.out_dir,
+            state_dir=None if args.no_state else args.state_dir,profile=args.profile,
+            cprofile=args.cprofile,verbose=not args.quiet)
+    df_out, df_disc = pipeline.run()
+    if args.strict and len(df_disc):
+        print('{!s}: {:d} discrepancies, see {!s}'.format(prog,len(df_disc),
+            os.path.join(args.out_dir,discrepancy_path)),file=sys.stderr)
+        return 3
+    return 0
+
+def rescore(args):
+    """
+    Rescore the calls of a delta of seqp_logs rows and patch the output.
+    """
+    from .pipeline import Pipeline
+    pipeline = Pipeline(args.input,rules=load_rules(args),cache_dir=args.cache_dir,use_cache=not args.no_cache,
+            db_config=args.db_config,db_snapshot=args.db_snapshot,out_dir=args.out_dir,
+            state_dir=args.state_dir)
+    pipeline.rescore(args.delta,append=args.append)
+    return 0
+
+def score_call(args):
+    """
+    Score the given calls from their own QSOs and spots only.
+    """
+    from .pipeline import Pipeline
+    pipeline    = Pipeline(args.input,rules=load_rules(args),cache_dir=args.cache_dir,use_cache=not args.no_cache,
+                    db_config=args.db_config,db_snapshot=args.db_snapshot,verbose=False)
+    # Calls are matched as logged, as the full run keys them.
+    calls       = list(args.calls)
+    # Keep stdout for the scores.
+    with contextlib.redirect_stdout(sys.stderr):
+        df_out  = pipeline.score_call(calls)
+    missing     = [x for x in calls if x not in set(df_out['call'])]
+    for call in missing:
+        print('{!s}: no QSOs with a grid square logged by {!s}'.format(prog,call),file=sys.stderr)
+    if args.csv:
+        df_out.to_csv(sys.stdout,index=False)
+    elif len(df_out) == 1:
+        print(df_out.set_index('call').T.to_string())
+    elif len(df_out):
+        print(df_out.to_string(index=False))
+    return 1 if missing else 0
+
+def cached_mode_counts(path,cache_dir):
+    """
+    QSOs per mode straight from the Feather cache with pyarrow, or None if
+    the cache is not built or pyarrow cannot do it.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.compute as pc
+        import pyarrow.ipc as ipc
+    except ImportError:
+        return None
+    fpath = cache_path(path,cache_dir)
+    if not os.path.exists(fpath):
+        return None
+    # A Feather file is an Arrow IPC file; reading it through pyarrow.ipc
+    # rather than feather.read_table() does not import pandas. Neither does
+    # working on the dictionaries of the encoded columns (turning a Python
+    # string into an Arrow scalar would).
+    source  = pa.memory_map(fpath)
+    schema  = ipc.open_file(source).schema
+    fields  = [schema.get_field_index(x) for x in ['source','mode']]
+    table   = ipc.open_file(source,options=ipc.IpcReadOptions(included_fields=fields)).read_all()
+    if not all(pa.types.is_dictionary(table[x].type) for x in ['source','mode']):
+        return None
+    counts  = {}
+    for src, mode in zip(table['source'].chunks,table['mode'].chunks):
+        names = src.dictionary.to_pylist()
+        if 'seqp_logs' not in names:
+            continue
+        inx     = names.index('seqp_logs')
+        mask    = pc.take(pc.is_in(src.dictionary,value_set=src.dictionary.slice(inx,1)),src.indices)
+        vc      = pc.value_counts(mode.filter(mask))
+        for value, count in zip(vc.field('values').to_pylist(),vc.field('counts').to_pylist()):
+            if value is not None:
+                counts[value] = counts.get(value,0) + count
+    return counts
+
+def list_modes(args):
+    """
+    Print the number of seqp_logs QSOs submitted in each mode.
+    """
+    counts = None
+    if not args.no_cache:
+        counts = cached_mode_counts(args.input,args.cache_dir)
+    if counts is None:
+        from . import ingest
+        df, report  = ingest.read_filtered(args.input,columns=['mode'],sources=['seqp_logs'],
+                        cache_dir=args.cache_dir,use_cache=not args.no_cache)
+        counts      = df['mode'].astype(str)[df['mode'].notnull()].value_counts().to_dict()
+    for mode in sorted(counts):
+        print('{!s:<8}{:>10d}'.format(mode,counts[mode]))
+    print('{!s:<8}{:>10d}'.format('total',sum(counts.values())))
+    return 0
+
+def variants(args):
+    """
+    Score the published rules and every variant in args.variants in one pass
+    and write one score table per variant and a ranking diff (seqp-variants.py).
+    """
+    import pandas as pd
+
+    from . import ingest
+    from .batch import evaluate, ranking_diff
+    from .index import CallIndex
+    from .rules import RuleSet, load_rulesets
+    from .scoring import call_table
+    from .snapshot import load_submissions
+
+    pd.set_option('display.width', 1000)
+    rulesets    = load_rulesets(args.variants)
+    if 'published' not in [x.name for x in rulesets]:
+        rulesets.insert(0,RuleSet())
+    names       = [x.name for x in rulesets]
+    if len(set(names)) != len(names):
+        raise ValueError('Rule variant names must be unique.')
+
+    t0      = time.time()
+    df      = ingest.read_seqp(args.input,cache_dir=args.cache_dir,use_cache=not args.no_cache)
+    tf      = df['source'] == 'seqp_logs'
+    df_seqp = df[tf].copy().sort_values(by = ['call_0', 'datetime']).reset_index(drop = True)
+    print('CSV read in complete...')
+
+    # Every variant scores the same calls; bands and sources only add columns.
+    df_calls    = call_table(df_seqp,CallIndex(df_seqp),rulesets[0].bands,rulesets[0].sources,verbose=False)
+    df_sub      = load_submissions(args.db_config,args.db_snapshot)
+    print('SQL database loaded...')
+
+    tables      = evaluate(rulesets,df_seqp,df_calls,df_sub,df)
+    print('Scored {:d} rule variants in {:.1f} s.'.format(len(tables),time.time()-t0))
+
+    os.makedirs(args.out_dir,exist_ok=True)
+    for name, df_out in tables.items():
+        df_out.to_csv(os.path.join(args.out_dir,'seqp_scores_{!s}.csv'.format(name)),index=False)
+
+    df_diff, df_summary = ranking_diff(tables)
+    df_diff.to_csv(os.path.join(args.out_dir,'ranking_diff.csv'))
+    df_summary.to_csv(os.path.join(args.out_dir,'ranking_summary.csv'),index=False)
+    print(df_summary.to_string(index=False))
+    return 0
+
+# -----------------------------------------------------------------------------
+# Parser and entry point.
+# -----------------------------------------------------------------------------
+
+def build_parser():
+    parser  = argparse.ArgumentParser(prog=prog,description='Score the Solar Eclipse QSO Party.')
+    parser.add_argument('--debug',action='store_true',help='Show the traceback of an error instead of its message.')
+    subs    = parser.add_subparsers(dest='command',metavar='command')
+
+    sub     = subs.add_parser('score',help='Score every call and write seqp_scores.csv.',
+                description='Score the Solar Eclipse QSO Party.')
+    add_input_args(sub)
+    add_db_args(sub)
+    add_rules_arg(sub)
+    sub.add_argument('--checkpoint-dir',default=checkpoint_dir,help='Stage checkpoint directory (default: %(default)s)')
+    sub.add_argument('--no-checkpoints',action='store_true',help='Recompute every stage and save no checkpoints.')
+    sub.add_argument('--chunk-size',type=int,
+            help='Stream the input this many rows at a time instead of loading it whole (out-of-core mode).')
+    sub.add_argument('--workers',type=int,default=1,help='Processes for per-call scoring (default: %(default)s)')
+    sub.add_argument('--mode-format',default='csv',choices=mode_formats,
+            help='Format of the per-mode QSO files in modes/ (default: %(default)s)')
+    sub.add_argument('--export-threads',type=int,default=4,help='Threads writing the per-mode files (default: %(default)s)')
+    sub.add_argument('--out-dir',default='.',help='Directory of the output files (default: %(default)s)')
+    sub.add_argument('--state-dir',default=state_dir,
+            help='Where to save the state `rescore` starts from (default: %(default)s)')
+    sub.add_argument('--no-state',action='store_true',help='Save no state for `rescore`.')
+    sub.add_argument('--profile',action='store_true',
+            help='Write per-stage timing and memory to seqp_scores_profile.json (adds tracemalloc overhead).')
+    sub.add_argument('--cprofile',action='store_true',
+            help='Also dump cProfile stats for every stage into seqp_scores_cprofile/.')
+    sub.add_argument('--strict',action='store_true',help='Exit with status 3 if the per-call counts do not reconcile.')
+    sub.add_argument('--quiet',action='store_true',help='Print nothing but errors.')
+    sub.set_defaults(func=score)
+
+    sub     = subs.add_parser('rescore',help='Rescore the calls of late or corrected logs.',
+                description='Apply a delta of seqp_logs rows to the state of the last `score` run, rescore '
+                            'only the calls in it and patch seqp_scores.csv.')
+    sub.add_argument('delta',help='CSV of seqp_logs rows in the format of the input')
+    sub.add_argument('--append',action='store_true',
+            help="Add the rows to the calls' QSOs instead of replacing them (default: replace).")
+    add_input_args(sub)
+    add_db_args(sub)
+    add_rules_arg(sub)
+    sub.add_argument('--out-dir',default='.',help='Directory of the output files (default: %(default)s)')
+    sub.add_argument('--state-dir',default=state_dir,help='State saved by `score` (default: %(default)s)')
+    sub.set_defaults(func=rescore)
+
+    sub     = subs.add_parser('call',help='Score a few calls; nothing is written.',
+                description='Score the given calls from their own QSOs and spots only.')
+    sub.add_argument('calls',nargs='+',metavar='CALL',help='Call of the logging station, as logged (case matters)')
+    add_input_args(sub)
+    add_db_args(sub)
+    add_rules_arg(sub)
+    sub.add_argument('--csv',action='store_true',help='Print CSV instead of a table.')
+    sub.set_defaults(func=score_call)
+
+    sub     = subs.add_parser('modes',help='Count the submitted QSOs per mode.',
+                description='Count the seqp_logs QSOs submitted in each mode.')
+    add_input_args(sub)
+    sub.set_defaults(func=list_modes)
+
+    sub     = subs.add_parser('variants',help='Score rule variants and compare the rankings.',
+                description='Score the Solar Eclipse QSO Party under several rule variants.')
+    sub.add_argument('--variants',required=True,help='JSON list of rule variants (see seqp_scoring/rules.py)')
+    sub.add_argument('--out-dir',default='variants',help='Output directory (default: %(default)s)')
+    add_input_args(sub)
+    add_db_args(sub)
+    sub.set_defaults(func=variants)
+    return parser
+
+def main(argv=None):
+    """
+    Run the command in `argv` (sys.argv[1:] if None) and return its exit
+    code.
+    """
+    parser  = build_parser()
+    try:
+        args = parser.parse_args(argv)
+    except SystemExit as err:
+        return err.code
+    if args.command is None:
+        parser.print_help(sys.stderr)
+        return 2
+    try:
+        return args.func(args)
+    except KeyboardInterrupt:
+        return 130
+    except Exception as err:
+        if args.debug:
+            raise
+        print('{!s}: error: {!s}: {!s}'.format(prog,type(err).__name__,err),file=sys.stderr)
+        return 1
+
+if __name__ == '__main__':
+    sys.exit(main())
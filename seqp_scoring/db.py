@@ -0,0 +1,328 @@
+"""
+Access to the seqp_* tables of the hamsci_rsrch database.
+
+Everything here only uses the Python DB-API, so the same code runs against the
+production MySQL server (mysql.connector) and a local SQLite stand-in created
+with connect_sqlite().
+
+connect() picks the backend and credentials from a config file (see
+read_config() and seqp_db.ini.example). MySQL connections come from a
+process-wide pool; the SQLite backend opens a file, or an in-memory database
+loaded from a dump of the seqp_* tables. Queries are written with %s
+placeholders and their values passed separately; they are rewritten for the
+SQLite paramstyle when needed.
+"""
+import configparser
+import hashlib
+import os
+import sqlite3
+from collections import OrderedDict
+
+import pandas as pd
+
+seqp_tables     = ['seqp_submissions','seqp_antennas','seqp_skimmers','seqp_wideband']
+
+# Defaults, overridden by the [hamsci_rsrch] section of the config file.
+config_section  = 'hamsci_rsrch'
+config_env      = 'SEQP_DB_CONFIG'
+config_paths    = ['seqp_db.ini',os.path.join('~','.seqp_db.ini')]
+default_config  = OrderedDict()
+default_config['backend']   = 'mysql'
+default_config['user']      = 'hamsci'
+default_config['password']  = 'hamsci'
+default_config['host']      = 'localhost'
+default_config['port']      = '3306'
+default_config['database']  = 'hamsci_rsrch'
+default_config['pool_size'] = '4'
+default_config['use_pure']  = 'no'
+default_config['path']      = ':memory:'
+default_config['dump']      = ''
+
+_pools  = {}
+
+# Schema of the SQLite stand-in. seqp_submissions mirrors the MySQL table
+# (see mysql_demo.py); the other tables carry the columns used for scoring.
+sqlite_schema = """
+CREATE TABLE IF NOT EXISTS seqp_submissions (
+    submitter_id        INTEGER PRIMARY KEY AUTOINCREMENT,
+    has_multi           INTEGER,
+    first_name          TEXT,
+    last_name           TEXT,
+    is_multi            INTEGER,
+    club_name           TEXT,
+    callsign            TEXT,
+    email               TEXT,
+    per_gs              TEXT,
+    radio_model         TEXT,
+    power               INTEGER DEFAULT 0,
+    is_tot              INTEGER,
+    is_out              INTEGER,
+    is_pub              INTEGER,
+    ground_conductivity REAL DEFAULT -1,
+    submitted_log       BLOB,
+    submitted_dsn       BLOB,
+    log_fname           TEXT,
+    dsn_fname           TEXT,
+    comment             BLOB,
+    entered             TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE IF NOT EXISTS seqp_antennas (
+    submitter_id    INTEGER NOT NULL,
+    has_160         INTEGER DEFAULT 0,
+    has_80          INTEGER DEFAULT 0,
+    has_40          INTEGER DEFAULT 0,
+    has_20          INTEGER DEFAULT 0,
+    has_15          INTEGER DEFAULT 0,
+    has_10          INTEGER DEFAULT 0,
+    has_6           INTEGER DEFAULT 0,
+    erp             TEXT
+);
+CREATE TABLE IF NOT EXISTS seqp_skimmers (
+    submitter_id    INTEGER NOT NULL,
+    mode            TEXT,
+    has_160         INTEGER DEFAULT 0,
+    has_80          INTEGER DEFAULT 0,
+    has_60          INTEGER DEFAULT 0,
+    has_40          INTEGER DEFAULT 0,
+    has_30          INTEGER DEFAULT 0,
+    has_20          INTEGER DEFAULT 0,
+    has_17          INTEGER DEFAULT 0,
+    has_15          INTEGER DEFAULT 0,
+    has_12          INTEGER DEFAULT 0,
+    has_10          INTEGER DEFAULT 0,
+    has_6           INTEGER DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS seqp_wideband (
+    submitter_id    INTEGER NOT NULL,
+    doi             TEXT,
+    has_160         INTEGER DEFAULT 0,
+    has_80          INTEGER DEFAULT 0,
+    has_60          INTEGER DEFAULT 0,
+    has_40          INTEGER DEFAULT 0,
+    has_30          INTEGER DEFAULT 0,
+    has_20          INTEGER DEFAULT 0,
+    has_17          INTEGER DEFAULT 0,
+    has_15          INTEGER DEFAULT 0,
+    has_12          INTEGER DEFAULT 0,
+    has_10          INTEGER DEFAULT 0,
+    has_6           INTEGER DEFAULT 0
+);
+"""
+
+def sha1_hex(value):
+    """
+    MySQL's SHA1(): the hex SHA-1 of a string or blob, None for NULL.
+    """
+    if value is None:
+        return None
+    if isinstance(value,str):
+        value = value.encode()
+    return hashlib.sha1(value).hexdigest()
+
+def connect_sqlite(path):
+    """
+    Open (and if needed create) a SQLite stand-in for hamsci_rsrch. SHA1()
+    is defined as in MySQL, so blob checksums can be queried on either
+    backend.
+    """
+    db = sqlite3.connect(path)
+    db.create_function('SHA1',1,sha1_hex)
+    db.executescript(sqlite_schema)
+    return db
+
+def read_config(path=None):
+    """
+    Database settings as an OrderedDict of strings. The config file is
+    `path`, else $SEQP_DB_CONFIG, else the first of config_paths that
+    exists; without one the defaults are used.
+    """
+    if path is None:
+        path = os.environ.get(config_env)
+    if path is None:
+        for fpath in config_paths:
+            if os.path.exists(os.path.expanduser(fpath)):
+                path = fpath
+                break
+
+    config  = OrderedDict(default_config)
+    if path is not None:
+        parser  = configparser.ConfigParser()
+        if not parser.read(os.path.expanduser(path)):
+            raise IOError('Cannot read database config {!s}'.format(path))
+        if parser.has_section(config_section):
+            config.update(parser.items(config_section))
+        # Relative SQLite paths are relative to the config file.
+        base    = os.path.dirname(os.path.abspath(os.path.expanduser(path)))
+        for key in ['path','dump']:
+            val = config[key]
+            if val and val != ':memory:' and not os.path.isabs(val):
+                config[key] = os.path.normpath(os.path.join(base,val))
+    return config
+
+def mysql_pool(config):
+    """
+    Connection pool for the MySQL server in `config`, shared by all callers
+    in this process.
+    """
+    from mysql.connector import pooling
+
+    key = tuple(config[x] for x in ['host','port','user','database','use_pure'])
+    if key not in _pools:
+        _pools[key] = pooling.MySQLConnectionPool(
+                pool_name   = 'seqp_{:d}'.format(len(_pools)),
+                pool_size   = int(config['pool_size']),
+                user        = config['user'],
+                password    = config['password'],
+                host        = config['host'],
+                port        = int(config['port']),
+                database    = config['database'],
+                use_pure    = config['use_pure'].lower() in ['1','yes','true','on'],
+                buffered    = True)
+    return _pools[key]
+
+def connect(config=None,**overrides):
+    """
+    Open a connection to hamsci_rsrch as described by `config` (a dict from
+    read_config() or the path of a config file), with keyword `overrides` of
+    single settings. Closing a MySQL connection returns it to the pool.
+    """
+    if config is None or isinstance(config,str):
+        config = read_config(config)
+    config  = OrderedDict(config)
+    config.update((key,str(val)) for key, val in overrides.items())
+    backend = config['backend'].lower()
+    if backend == 'mysql':
+        return mysql_pool(config).get_connection()
+    if backend == 'sqlite':
+        db = connect_sqlite(config['path'])
+        if config['dump']:
+            load_dump(db,config['dump'])
+        return db
+    raise ValueError('Unknown database backend {!s}'.format(backend))
+
+def load_dump(db,dump_path):
+    """
+    Load a dump of the seqp_* tables into an empty SQLite database. The dump
+    is either a SQL script or a SQLite file (e.g. written by copy_tables()).
+    """
+    if query(db,'SELECT COUNT(*) FROM seqp_submissions')[0][0] > 0:
+        return
+    with open(dump_path,'rb') as fl:
+        is_sqlite = fl.read(16) == b'SQLite format 3\x00'
+    if is_sqlite:
+        src = sqlite3.connect(dump_path)
+        try:
+            copy_tables(src,db)
+        finally:
+            src.close()
+    else:
+        with open(dump_path) as fl:
+            db.executescript(fl.read())
+    db.commit()
+
+def copy_tables(src,dst,tables=seqp_tables,batch_size=256):
+    """
+    Copy the seqp_* tables from the database `src` (any backend) into the
+    SQLite database `dst`, e.g. to make a local dump of the MySQL server.
+    Only the columns present in both `src` and the SQLite schema are copied.
+    """
+    for table in tables:
+        crsr    = src.cursor()
+        crsr.execute('SELECT * FROM {!s} WHERE 1 = 0'.format(table))
+        src_cols = [x[0] for x in crsr.description]
+        crsr.fetchall()
+        crsr.close()
+        columns = [x[1] for x in dst.execute('PRAGMA table_info({!s})'.format(table)) if x[1] in src_cols]
+        qry     = 'SELECT {!s} FROM {!s}'.format(', '.join(columns),table)
+        ins     = 'INSERT INTO {!s} ({!s}) VALUES ({!s})'.format(table,', '.join(columns),
+                        ', '.join(['?']*len(columns)))
+        rows    = []
+        for row in stream(src,qry,batch_size=batch_size):
+            rows.append(row)
+            if len(rows) >= batch_size:
+                dst.executemany(ins,rows)
+                rows = []
+        if rows:
+            dst.executemany(ins,rows)
+    dst.commit()
+
+def prepare(db,qry):
+    """
+    Rewrite the %s placeholders of `qry` for the paramstyle of `db`.
+    """
+    if isinstance(db,sqlite3.Connection):
+        return qry.replace('%s','?')
+    return qry
+
+def placeholders(n):
+    """
+    '%s, %s, ...' for an IN (...) list of n values.
+    """
+    return ', '.join(['%s']*n)
+
+def execute(crsr,db,qry,params=None):
+    """
+    Execute `qry` on `crsr`, passing `params` to the driver for escaping.
+    """
+    if params is None:
+        crsr.execute(qry)
+    else:
+        crsr.execute(prepare(db,qry),tuple(params))
+
+def query(db,qry,params=None):
+    """
+    SQL query function to return the data in some row.
+    """
+    crsr = db.cursor()
+    execute(crsr,db,qry,params)
+    results = crsr.fetchall()
+    crsr.close()
+    return results
+
+def read_frame(db,qry,params=None):
+    """
+    Run a query and return the result as a DataFrame.
+    """
+    crsr    = db.cursor()
+    execute(crsr,db,qry,params)
+    columns = [x[0] for x in crsr.description]
+    results = crsr.fetchall()
+    crsr.close()
+    return pd.DataFrame.from_records(results,columns=columns)
+
+def stream(db,qry,params=None,batch_size=8):
+    """
+    Yield the rows of a query without buffering the whole result set.
+
+    The cursor is unbuffered where the driver supports it (mysql.connector),
+    and rows are pulled `batch_size` at a time, so memory is bounded by the
+    largest batch instead of the whole table.
+    """
+    try:
+        crsr = db.cursor(buffered=False)
+    except TypeError:
+        crsr = db.cursor()
+    try:
+        execute(crsr,db,qry,params)
+        while True:
+            rows = crsr.fetchmany(batch_size)
+            if not rows:
+                break
+            for row in rows:
+                yield row
+    finally:
+        crsr.close()
+
+if __name__ == '__main__':
+    import argparse
+
+    parser  = argparse.ArgumentParser(description='Dump the seqp_* tables into a SQLite file.')
+    parser.add_argument('out',help='SQLite file to write')
+    parser.add_argument('--config',help='Database config of the source (default: see read_config)')
+    args    = parser.parse_args()
+
+    src     = connect(args.config)
+    dst     = connect_sqlite(args.out)
+    copy_tables(src,dst)
+    dst.close()
+    src.close()
@@ -0,0 +1,65 @@
+"""
+Default paths and option values shared by the scoring modules and the
+command line, and the manifest that maps the input CSV to its columnar cache.
+
+This module uses the standard library only, so that the CLI can build its
+parser and find the cache (see cli.py) without importing pandas.
+"""
+import hashlib
+import json
+import os
+
+csv_path        = 'seqp_all_ctyChecked.csv.bz2'
+cache_dir       = '.seqp_cache'
+cache_version   = 2
+checkpoint_dir  = os.path.join(cache_dir,'checkpoints')
+snapshot_dir    = os.path.join(cache_dir,'hamsci_rsrch')
+state_dir       = os.path.join(cache_dir,'state')
+snapshot_modes  = ['auto','offline','refresh','off']
+mode_formats    = ['csv','csv.gz','csv.zst','parquet']
+
+# -----------------------------------------------------------------------------
+# Source manifest.
+# -----------------------------------------------------------------------------
+
+def file_hash(path,blocksize=1<<20):
+    """
+    SHA-1 of a file's contents.
+    """
+    sha = hashlib.sha1()
+    with open(path,'rb') as fl:
+        for block in iter(lambda: fl.read(blocksize),b''):
+            sha.update(block)
+    return sha.hexdigest()
+
+def source_key(path,cache_dir=cache_dir):
+    """
+    Return the content hash of `path`, rehashing only if its size or mtime
+    differ from the ones recorded in the cache manifest.
+    """
+    stat        = os.stat(path)
+    mpath       = os.path.join(cache_dir,'manifest.json')
+    manifest    = {}
+    if os.path.exists(mpath):
+        with open(mpath) as fl:
+            manifest = json.load(fl)
+
+    apath   = os.path.abspath(path)
+    entry   = manifest.get(apath)
+    if entry is not None and entry['size'] == stat.st_size and entry['mtime'] == stat.st_mtime:
+        return entry['sha1']
+
+    entry   = {'size':stat.st_size,'mtime':stat.st_mtime,'sha1':file_hash(path)}
+    manifest[apath] = entry
+    with open(mpath+'.tmp','w') as fl:
+        json.dump(manifest,fl,indent=1)
+    os.replace(mpath+'.tmp',mpath)
+    return entry['sha1']
+
+def cache_path(path,cache_dir=cache_dir):
+    """
+    Path of the Feather cache of `path`, whether or not it has been built.
+    """
+    os.makedirs(cache_dir,exist_ok=True)
+    key = source_key(path,cache_dir)
+    return os.path.join(cache_dir,'{!s}-v{:d}.feather'.format(key,cache_version))
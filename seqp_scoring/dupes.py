@@ -0,0 +1,72 @@
+"""
+Dupe detection for SEQP logs.
+
+"Duplicate contacts on the same band and mode as a previous QSO with a
+ station are allowed after 10 minutes have elapsed since the previous QSO
+ with that station. The same station may be worked on all SEQP bands and
+ modes."
+"""
+import datetime
+import numpy as np
+import pandas as pd
+
+dupe_keys   = ['call_0','band','mode','call_1']
+dupe_window = datetime.timedelta(minutes=10)
+
+def dupe_gaps(df_seqp,calls,bands,modes,mask=None):
+    """
+    Time since the previous QSO of the same (call_0, band, mode, call_1)
+    group for every QSO, in a single sorted pass.
+
+    Rows keep their df_seqp order inside each group, so df_seqp should
+    already be sorted by ['call_0','datetime']. Only QSOs logged by one of
+    `calls` on one of `bands` with one of `modes` are considered, and only
+    rows where the boolean `mask` is set, if given. Returns a timedelta
+    Series aligned with df_seqp; it is NaT for the first QSO of each group
+    and for rows that were not considered.
+    """
+    calls   = pd.Index(calls)
+    tf      = np.logical_and.reduce( (df_seqp['call_0'].isin(calls),
+                df_seqp['band'].isin(bands), df_seqp['mode'].isin(modes)) )
+    if mask is not None:
+        tf  = np.logical_and(tf,mask)
+    dft     = df_seqp[tf]
+
+    # Group id for every candidate QSO; -1 marks rows with a null key.
+    gid     = dft.groupby(dupe_keys,sort=False,observed=True).ngroup().values
+    order   = np.argsort(gid,kind='stable')
+    gid     = gid[order]
+    times   = dft['datetime'].values[order]
+
+    same    = np.logical_and(gid[1:] == gid[:-1], gid[1:] >= 0)
+    gap     = np.full(len(dft),np.timedelta64('NaT'),dtype='timedelta64[ns]')
+    gap[order[1:]] = np.where(same,times[1:] - times[:-1],np.timedelta64('NaT'))
+
+    gaps    = np.full(len(df_seqp),np.timedelta64('NaT'),dtype='timedelta64[ns]')
+    gaps[np.flatnonzero(tf)] = gap
+    return pd.Series(gaps,index=df_seqp.index)
+
+def flag_dupes(df_seqp,gaps,calls,window=dupe_window):
+    """
+    Dupes from the gaps of dupe_gaps(): QSOs less than `window` after the
+    previous QSO of their group. Several windows can share one dupe_gaps().
+
+    Returns a boolean Series aligned with df_seqp and a Series with the
+    number of dupes for each call in `calls`.
+    """
+    dupe    = gaps < pd.Timedelta(window)
+    dupes   = pd.Series(df_seqp['call_0'].values[dupe.values]).value_counts()
+    dupes   = dupes.reindex(pd.Index(calls),fill_value=0)
+    return dupe, dupes
+
+def find_dupes(df_seqp,calls,bands,modes,window=dupe_window,mask=None):
+    """
+    Flag dupe QSOs in df_seqp (see dupe_gaps and flag_dupes). A QSO is a
+    dupe if the QSO before it in the same (call_0, band, mode, call_1) group
+    is less than `window` earlier.
+
+    Returns a boolean Series aligned with df_seqp and a Series with the
+    number of dupes for each call in `calls`.
+    """
+    gaps    = dupe_gaps(df_seqp,calls,bands,modes,mask=mask)
+    return flag_dupes(df_seqp,gaps,calls,window)
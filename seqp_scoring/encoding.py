@@ -0,0 +1,102 @@
+"""
+Dictionary encoding of the SEQP string columns.
+
+call_0/call_1 share one callsign vocabulary and grid_0/grid_1 share one grid
+vocabulary, so the equality masks, isin() checks and groupbys of every stage
+compare small integer codes instead of Python strings. mode and source get
+their own categoricals. The 4-character grid squares are derived once from
+the grid categories as grid_0_4char/grid_1_4char.
+
+Categories are sorted, so sorting an encoded column gives the same order as
+sorting the strings.
+"""
+import numpy as np
+import pandas as pd
+
+call_columns    = ['call_0','call_1']
+grid_columns    = ['grid_0','grid_1']
+other_columns   = ['mode','source']
+derived_columns = ['grid_0_4char','grid_1_4char']
+
+def categories(*columns):
+    """
+    Sorted union of the non-null values of the given columns.
+    """
+    values = []
+    for col in columns:
+        if isinstance(col.dtype,pd.CategoricalDtype):
+            values.append(np.asarray(col.cat.categories,dtype=object))
+        else:
+            values.append(col.dropna().unique().astype(object))
+    if len(values) == 0:
+        return pd.Index([],dtype=object)
+    cats = pd.Index(pd.unique(np.concatenate(values)),dtype=object)
+    return cats.sort_values()
+
+def encode_columns(df,keys):
+    """
+    Convert the `keys` columns of df to one shared, sorted categorical dtype.
+    """
+    keys = [x for x in keys if x in df]
+    if len(keys) == 0:
+        return None
+    dtype = pd.CategoricalDtype(categories(*[df[x] for x in keys]))
+    for key in keys:
+        if df[key].dtype != dtype:
+            df[key] = df[key].astype(object).astype(dtype)
+    return dtype
+
+def grid_4char(grid):
+    """
+    First 4 characters of an encoded grid column, computed on its categories
+    only and returned as a categorical.
+    """
+    cats    = pd.Index(grid.cat.categories.str[:4])
+    cats_4  = cats.unique().sort_values()
+    lookup  = np.append(cats_4.get_indexer(cats),-1).astype(np.int32)
+    codes   = lookup[grid.cat.codes.values]
+    return pd.Series(pd.Categorical.from_codes(codes,categories=cats_4),index=grid.index)
+
+def encode(df):
+    """
+    Dictionary-encode the call, grid, mode and source columns of df and add
+    the 4-character grid columns. Returns df.
+    """
+    encode_columns(df,call_columns)
+    encode_columns(df,grid_columns)
+    for key in other_columns:
+        encode_columns(df,[key])
+
+    for key, derived in zip(grid_columns,derived_columns):
+        if key in df and derived not in df:
+            df[derived] = grid_4char(df[key])
+    encode_columns(df,derived_columns)
+    return df
+
+def concat(frames):
+    """
+    Concatenate encoded DataFrames. The categories of every vocabulary are
+    unified first, so that the columns stay categorical instead of being
+    decoded to strings and encoded again.
+    """
+    frames = [df.copy(deep=False) for df in frames]
+    groups = [call_columns,grid_columns,derived_columns] + [[x] for x in other_columns]
+    for keys in groups:
+        keys = [x for x in keys if all(x in df for df in frames)]
+        if len(keys) == 0:
+            continue
+        dtype = pd.CategoricalDtype(categories(*[df[x] for df in frames for x in keys]))
+        for df in frames:
+            for key in keys:
+                df[key] = df[key].astype(dtype)
+    return pd.concat(frames,ignore_index=True)
+
+def str_len(col):
+    """
+    String length of every value in a column; nulls give -1. Categorical
+    columns are measured on their categories only.
+    """
+    if isinstance(col.dtype,pd.CategoricalDtype):
+        lens = np.append(col.cat.categories.str.len().values,-1)
+        return lens[col.cat.codes.values]
+    return col.str.len().fillna(-1).values
@@ -0,0 +1,61 @@
+"""
+Per-mode export of the scrubbed QSOs (the modes/ directory).
+"""
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+
+from . import encoding
+from .defaults import mode_formats
+
+def export_modes(df_seqp,modes_path='modes',fmt='csv',mask=None,threads=4,verbose=True):
+    """
+    Split df_seqp by mode in one groupby pass and write one file per mode,
+    plus 000_mode_summary.csv with the QSO count of every mode.
+
+    fmt is one of mode_formats. 'csv.gz' and 'csv.zst' write compressed CSVs
+    ('csv.zst' needs the zstandard package). 'parquet' writes a single
+    dataset under modes_path/qsos/, partitioned by mode, instead of one file
+    per mode. CSV files are written concurrently by `threads` threads. Only
+    rows where the boolean `mask` is set are exported, if given. The files
+    are listed as they are written if `verbose`.
+
+    Returns the mode summary DataFrame.
+    """
+    if fmt not in mode_formats:
+        raise ValueError('Unknown mode export format {!r}; use one of {!s}.'.format(fmt,mode_formats))
+
+    if os.path.exists(modes_path):
+        shutil.rmtree(modes_path)
+    os.makedirs(modes_path)
+
+    dft     = df_seqp if mask is None else df_seqp[mask]
+    dft     = dft.drop(columns=encoding.derived_columns,errors='ignore')
+    groups  = dft.groupby('mode',observed=True,sort=True)
+
+    df_mode = groups.size().reset_index(name='count')
+    df_mode['mode'] = df_mode['mode'].astype(object)
+
+    if fmt == 'parquet':
+        fpath   = os.path.join(modes_path,'qsos')
+        if verbose:
+            print('  --> {!s}'.format(fpath))
+        dft.to_parquet(fpath,partition_cols=['mode'],index=False)
+    else:
+        def write(mode,df_m):
+            fpath   = os.path.join(modes_path,'{!s}.{!s}'.format(mode,fmt))
+            df_m.to_csv(fpath,index=False)
+            return fpath
+
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            futures = [pool.submit(write,mode,df_m) for mode, df_m in groups]
+            for future in futures:
+                fpath   = future.result()
+                if verbose:
+                    print('  --> {!s}'.format(fpath))
+
+    fpath   = os.path.join(modes_path,'000_mode_summary.csv')
+    if verbose:
+        print('  --> {!s}'.format(fpath))
+    df_mode.to_csv(fpath,index=False)
+    return df_mode
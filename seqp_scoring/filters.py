@@ -0,0 +1,91 @@
+"""
+Mask-composed row filtering.
+
+Every rule (required fields, grid length, valid mode, not a dupe) is folded
+into one boolean mask instead of copying the DataFrame after each step. The
+rule that dropped each row is recorded, which gives per-rule and per-call
+drop counts, and the surviving rows are materialized once with selection().
+"""
+
+import numpy as np
+import pandas as pd
+
+from . import encoding
+
+required_fields = ['call_0','call_1','mode','band','datetime','grid_0','grid_1']
+
+class FilterPipeline(object):
+    """
+    Compose row filters over df into one boolean mask.
+    """
+    def __init__(self,df):
+        self.df     = df
+        self.mask   = np.ones(len(df),dtype=bool)
+        self.rules  = []
+        # Index into self.rules (+1) of the rule that dropped each row; 0 = kept.
+        self.reason = np.zeros(len(df),dtype=np.int8)
+
+    def apply(self,rule,keep):
+        """
+        Drop the rows where `keep` is False and charge them to `rule`.
+        Rows already dropped by an earlier rule are not counted again.
+        """
+        keep    = np.asarray(keep,dtype=bool)
+        dropped = np.logical_and(self.mask,np.logical_not(keep))
+        self.rules.append(rule)
+        self.reason[dropped] = len(self.rules)
+        self.mask &= keep
+        return self
+
+    def required(self,keys=required_fields):
+        """
+        Drop rows missing any of the required fields.
+        """
+        keys = [x for x in keys if x in self.df]
+        return self.apply('required_fields',self.df[keys].notnull().all(axis=1).values)
+
+    def grid_length(self,keys=encoding.grid_columns,length=4):
+        """
+        Drop rows with grid squares shorter than `length` characters.
+        """
+        keep = np.logical_and.reduce([encoding.str_len(self.df[x]) >= length for x in keys])
+        return self.apply('grid_length',keep)
+
+    def valid_mode(self,modes):
+        """
+        Drop rows whose mode is not in `modes`.
+        """
+        return self.apply('invalid_mode',self.df['mode'].isin(modes).values)
+
+    def not_dupe(self,dupe):
+        """
+        Drop rows flagged as dupes.
+        """
+        return self.apply('dupe',np.logical_not(np.asarray(dupe,dtype=bool)))
+
+    def selection(self):
+        """
+        Materialize the rows that passed every rule.
+        """
+        return self.df[self.mask]
+
+    def counts(self):
+        """
+        Number of rows dropped by each rule.
+        """
+        counts = np.bincount(self.reason,minlength=len(self.rules)+1)[1:]
+        return pd.Series(counts,index=self.rules)
+
+    def breakdown(self,by='call_0',index=None):
+        """
+        Rows dropped by each rule, per value of column `by`.
+        """
+        tf      = self.reason > 0
+        keys    = np.asarray(self.df[by].values[tf],dtype=object)
+        rules   = np.asarray(self.rules,dtype=object)[self.reason[tf]-1]
+        df_drop = pd.crosstab(pd.Series(keys,name=by),pd.Series(rules,name='rule'))
+        df_drop = df_drop.reindex(columns=self.rules,fill_value=0)
+        if index is not None:
+            df_drop = df_drop.reindex(index,fill_value=0)
+        df_drop.columns.name = None
+        return df_drop
@@ -0,0 +1,151 @@
+"""
+Incremental rescoring when late or corrected logs arrive.
+
+Every score column of a call depends only on its own seqp_logs QSOs, its
+submissions and the spots of it (call_1 == call); seqp_logs rows are never
+spots. So a delta of seqp_logs rows only changes the scores of the calls
+that logged them, and Pipeline.rescore() recomputes just those calls.
+
+A full run (Pipeline.run) saves the state rescoring needs to state_dir:
+    qsos:           the seqp_logs QSOs, sorted by call_0 and datetime.
+    scores, drops, discrepancies:
+                    seqp_scores.csv, seqp_drops.csv and
+                    seqp_discrepancies.csv as DataFrames.
+    spots:          the distinct binned spots (see chunked.bin_keys) of the
+                    scored calls; state.json lists these spot_calls.
+    state.json:     also the key of the rules and the SHA-1 of the input the
+                    state belongs to.
+
+The calls in a delta get their QSOs replaced by the delta's (a resubmitted
+log) or, with append, extended by them. Their QSOs are then scored exactly
+as in a full run: dupe flags, QSO counts, grid squares and the reconcile
+checks come from their own rows, and the spot bonus is recounted from the
+saved bins with their (possibly new) grid square. Only calls that had no
+bins yet are read from the input, with the call pushed down. The patched
+tables equal those of a full run over the input with the delta applied and
+the delta rows placed after the other rows of their calls.
+
+The modes/ files are not patched; a full run rewrites them.
+"""
+import hashlib
+import json
+import os
+import shutil
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from . import encoding, ingest
+from .defaults import state_dir
+from .reconcile import check_names
+
+state_tables    = ['qsos','scores','drops','discrepancies','spots']
+meta_name       = 'state.json'
+
+def rules_key(rules):
+    """
+    SHA-1 of the parameters of a RuleSet.
+    """
+    blob = json.dumps(rules.params(),sort_keys=True,default=str)
+    return hashlib.sha1(blob.encode()).hexdigest()
+
+def save_state(tables,meta,path=state_dir):
+    """
+    Save the state `tables` (an OrderedDict of state_tables) and `meta`. The
+    state is written to a temporary directory and swapped in, so an
+    interrupted run leaves the old one.
+    """
+    tmp_path = path+'.tmp'
+    shutil.rmtree(tmp_path,ignore_errors=True)
+    os.makedirs(tmp_path)
+    for name in state_tables:
+        pd.to_pickle(tables[name],os.path.join(tmp_path,'{!s}.pkl'.format(name)))
+    with open(os.path.join(tmp_path,meta_name),'w') as fl:
+        json.dump(meta,fl,indent=1)
+    shutil.rmtree(path,ignore_errors=True)
+    os.replace(tmp_path,path)
+
+def load_state(path=state_dir):
+    """
+    Load a saved state as (tables, meta).
+    """
+    fpath = os.path.join(path,meta_name)
+    if not os.path.exists(fpath):
+        raise RuntimeError('No scoring state in {!s}; run a full score first.'.format(path))
+    with open(fpath) as fl:
+        meta = json.load(fl,object_pairs_hook=OrderedDict)
+    tables = OrderedDict()
+    for name in state_tables:
+        tables[name] = pd.read_pickle(os.path.join(path,'{!s}.pkl'.format(name)))
+    return tables, meta
+
+def check_state(meta,rules,source_key):
+    """
+    Refuse a state saved under other rules or from another input.
+    """
+    if meta['rules'] != rules_key(rules):
+        raise RuntimeError('The scoring state was saved under different rules; rescore under the rules of the last full score or run one again.')
+    if meta['source_key'] != source_key:
+        raise RuntimeError('The input changed since the scoring state was saved; run a full score first.')
+
+def read_delta(path,verbose=True):
+    """
+    Read a delta CSV (rows in the format of the input). Rows of other
+    sources than seqp_logs are ignored.
+    """
+    df_delta = ingest.read_csv(path)
+    if 'source' in df_delta:
+        tf = (df_delta['source'] == 'seqp_logs').values
+        if not tf.all():
+            if verbose:
+                print('  --> {:d} delta rows not from seqp_logs ignored'.format(int((~tf).sum())))
+        df_delta = df_delta[tf]
+    return df_delta
+
+def apply_delta(df_qsos,df_delta,append=False):
+    """
+    Replace (or, with append, extend) the QSOs of every call in df_delta.
+    Returns the new sorted, encoded QSOs and the sorted calls of the delta.
+    """
+    calls   = sorted(df_delta['call_0'].dropna().astype(str).unique())
+    if not append:
+        df_qsos = df_qsos[~df_qsos['call_0'].isin(calls).values]
+    df_qsos = encoding.concat([df_qsos,df_delta])
+    return df_qsos.sort_values(by = ['call_0', 'datetime']).reset_index(drop = True), calls
+
+# -----------------------------------------------------------------------------
+# Patching the output tables.
+# -----------------------------------------------------------------------------
+
+def patch_scores(df_old,df_new,calls):
+    """
+    df_old with the rows of `calls` replaced by df_new, in call order.
+    """
+    parts = [df_old[~df_old['call'].isin(calls)]]
+    if len(df_new):
+        parts.append(df_new)
+    df_out = pd.concat(parts,ignore_index=True)
+    return df_out.sort_values('call',kind='mergesort').reset_index(drop=True)
+
+def patch_drops(df_old,df_new,calls):
+    """
+    patch_scores() for the drop table, which is indexed by call.
+    """
+    parts = [df_old.drop(index=calls,errors='ignore')]
+    if len(df_new):
+        parts.append(df_new)
+    return pd.concat(parts).sort_index(kind='mergesort')
+
+def patch_discrepancies(df_old,df_new,calls,bands):
+    """
+    patch_scores() for the reconcile report, which is ordered by check and
+    then by call.
+    """
+    parts = [df_old[~df_old['call'].isin(calls)]]
+    if len(df_new):
+        parts.append(df_new)
+    df_disc = pd.concat(parts,ignore_index=True)
+    checks  = pd.Categorical(df_disc['check'],categories=check_names(bands)).codes
+    order   = np.lexsort((df_disc['call'].astype(str).values,checks))
+    return df_disc.iloc[order].reset_index(drop=True)
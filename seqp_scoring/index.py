@@ -0,0 +1,115 @@
+"""
+Callsign index over a frame sorted by call_0.
+
+df_seqp is sorted by ['call_0','datetime'], so each call's QSOs are one
+contiguous block of rows. CallIndex records the (start, stop) offsets of
+every block in one O(N) pass, so a call's QSOs are a positional slice
+instead of a `df_seqp['call_0'] == call` scan over the whole table. A
+secondary index holds the rows of every (call, band) pair.
+
+filter(mask) returns the index of df[mask] from prefix sums of the mask,
+without looking at the callsigns again, so the index stays correct as rows
+are dropped.
+"""
+import numpy as np
+import pandas as pd
+
+def column_codes(col):
+    """
+    Integer codes and categories of a column; nulls get -1.
+    """
+    if isinstance(col.dtype,pd.CategoricalDtype):
+        return np.asarray(col.cat.codes), col.cat.categories
+    codes, uniques = pd.factorize(col,sort=True)
+    return codes, uniques
+
+class CallIndex(object):
+    """
+    callsign -> (start, stop) row offsets into a frame sorted by `key`, with
+    per-band row lists.
+    """
+    def __init__(self,df,key='call_0',band_key='band'):
+        codes, cats = column_codes(df[key])
+        n_rows      = len(codes)
+        if n_rows == 0:
+            starts  = np.zeros(0,dtype=np.int64)
+        else:
+            starts  = np.flatnonzero(np.r_[True,codes[1:] != codes[:-1]])
+        stops       = np.r_[starts[1:],n_rows].astype(np.int64)
+        run_codes   = codes[starts]
+        if len(np.unique(run_codes)) != len(run_codes):
+            raise ValueError('Frame is not sorted by {!s}.'.format(key))
+
+        keep        = run_codes >= 0
+        self.calls  = pd.Index(np.asarray(cats,dtype=object)[run_codes[keep]])
+        self.starts = starts[keep]
+        self.stops  = stops[keep]
+        self.n_rows = n_rows
+
+        # Secondary index: rows of each call ordered by band, with offsets.
+        band_codes, band_cats = column_codes(df[band_key])
+        self.bands  = pd.Index(band_cats)
+        n_bands     = len(self.bands) + 1
+        run_ids     = np.where(keep,np.cumsum(keep)-1,-1)
+        row_call    = np.repeat(run_ids,stops-starts)
+        covered     = np.flatnonzero(row_call >= 0)
+        band_key_   = row_call[covered]*n_bands + (band_codes[covered] + 1)
+        order       = np.argsort(band_key_,kind='stable')
+        self.band_order     = covered[order]
+        bounds      = np.arange(len(self.calls)*n_bands + 1)
+        self.band_offsets   = np.searchsorted(band_key_[order],bounds)
+
+    def __len__(self):
+        return len(self.calls)
+
+    def position(self,call):
+        return self.calls.get_loc(call)
+
+    def slice(self,call):
+        """
+        Positional slice of the rows of `call`.
+        """
+        inx = self.position(call)
+        return slice(int(self.starts[inx]),int(self.stops[inx]))
+
+    def sizes(self,calls=None):
+        """
+        Number of rows per call, optionally reindexed to `calls`.
+        """
+        sizes = pd.Series(self.stops-self.starts,index=self.calls)
+        if calls is not None:
+            sizes = sizes.reindex(calls,fill_value=0)
+        return sizes
+
+    def band_sizes(self,calls=None,bands=None):
+        """
+        Number of rows per call and band, optionally reindexed to `calls`
+        and `bands`.
+        """
+        n_bands = len(self.bands) + 1
+        counts  = np.diff(self.band_offsets).reshape(len(self.calls),n_bands)[:,1:]
+        sizes   = pd.DataFrame(counts,index=self.calls,columns=self.bands)
+        if calls is not None:
+            sizes = sizes.reindex(index=calls,fill_value=0)
+        if bands is not None:
+            sizes = sizes.reindex(columns=bands,fill_value=0)
+        return sizes
+
+    def filter(self,mask):
+        """
+        Index of df[mask], computed from prefix sums of the boolean mask.
+        Calls left without rows keep an empty range.
+        """
+        mask    = np.asarray(mask,dtype=bool)
+        prefix  = np.r_[0,np.cumsum(mask)]
+        new     = object.__new__(CallIndex)
+        new.calls   = self.calls
+        new.bands   = self.bands
+        new.starts  = prefix[self.starts]
+        new.stops   = prefix[self.stops]
+        new.n_rows  = int(prefix[-1])
+
+        keep    = mask[self.band_order]
+        new.band_order      = prefix[self.band_order[keep]]
+        new.band_offsets    = np.r_[0,np.cumsum(keep)][self.band_offsets]
+        return new
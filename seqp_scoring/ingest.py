@@ -0,0 +1,248 @@
+"""
+Reading the seqp_all_ctyChecked.csv.bz2 input.
+
+Parsing the bz2-compressed CSV takes minutes, so the first read converts it to
+a Feather (Arrow IPC) file in a cache directory, with the string columns
+already dictionary-encoded (see encoding.py). The cache file is named after
+the SHA-1 of the source file. A manifest stores each source's size, mtime and
+hash, so the file is only hashed again when its size or mtime changes. Later
+runs memory-map the Feather file and can load just the columns they need.
+
+read_filtered() pushes row predicates (source, call, band, time range and the
+scrub rules) and column projections down to the read, and reports how many
+rows each predicate removed.
+
+pyarrow is optional. Without it every run reads the CSV directly. If the
+cache of an input cannot be written, a <cache>.failed file records why and
+the CSV is read directly until it is deleted.
+"""
+import os
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from . import encoding
+from .defaults import cache_dir, cache_path, csv_path, source_key
+from .filters import required_fields
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.feather as feather
+except ImportError:
+    feather = None
+
+def common_dtype(dtypes):
+    """
+    The dtype of a column read in one piece, from its dtypes in the chunks.
+    """
+    dtypes = list(OrderedDict.fromkeys(dtypes))
+    if len(dtypes) == 1:
+        return dtypes[0]
+    if all(pd.api.types.is_integer_dtype(x) or pd.api.types.is_float_dtype(x) for x in dtypes):
+        return np.result_type(*dtypes)
+    return np.dtype(object)
+
+def read_csv(path,columns=None):
+    """
+    Read the SEQP CSV with parsed datetimes and encoded string columns.
+    """
+    df = pd.read_csv(path,usecols=columns,parse_dates=['datetime'])
+    return encoding.encode(df)
+
+def cache_file(path,cache_dir=cache_dir,verbose=True):
+    """
+    Path of the Feather cache of `path`, built first if needed. Returns None
+    if the cache cannot be written. Says so if `verbose`.
+    """
+    fpath = cache_path(path,cache_dir)
+    if os.path.exists(fpath+'.failed'):
+        return None
+    if not os.path.exists(fpath):
+        if verbose:
+            print('Building columnar cache {!s}...'.format(fpath))
+        df = read_csv(path)
+        try:
+            df.to_feather(fpath+'.tmp')
+        except Exception as err:
+            if verbose:
+                print('  --> Could not cache {!s} ({!s}); reading CSV.'.format(path,err))
+            with open(fpath+'.failed','w') as fl:
+                fl.write('{!s}\n'.format(err))
+            return None
+        os.replace(fpath+'.tmp',fpath)
+    return fpath
+
+def columnar_cache(path=csv_path,cache_dir=cache_dir,use_cache=True,verbose=True):
+    """
+    Path of the columnar cache of `path` (see cache_file), or None if the
+    input is read from the CSV.
+    """
+    if feather is None or not use_cache:
+        return None
+    return cache_file(path,cache_dir,verbose)
+
+def read_seqp(path=csv_path,columns=None,cache_dir=cache_dir,use_cache=True,verbose=True):
+    """
+    Read the SEQP input, going through the columnar cache when pyarrow is
+    available. `columns` limits the columns that are loaded.
+    """
+    fpath = columnar_cache(path,cache_dir,use_cache,verbose)
+    if fpath is None:
+        return read_csv(path,columns)
+    table = feather.read_table(fpath,columns=columns,memory_map=True)
+    return encoding.encode(table.to_pandas())
+
+# -----------------------------------------------------------------------------
+# Predicate pushdown.
+# -----------------------------------------------------------------------------
+
+def predicates(sources=None,calls=None,bands=None,time_range=None,scrub=False,call_key='call_1'):
+    """
+    The row predicates of read_filtered() as an OrderedDict of
+    name -> (kind, columns, argument), cheapest first.
+    """
+    preds = OrderedDict()
+    if sources is not None:
+        preds['source']     = ('isin',['source'],list(sources))
+    if bands is not None:
+        preds['band']       = ('isin',['band'],list(bands))
+    if time_range is not None:
+        preds['time_range'] = ('range',['datetime'],time_range)
+    if calls is not None:
+        preds[call_key]     = ('isin',[call_key],[str(x) for x in calls])
+    if scrub:
+        preds['required_fields']    = ('notnull',list(required_fields),None)
+        preds['grid_length']        = ('min_len',list(encoding.grid_columns),4)
+    return preds
+
+def arrow_mask(table,kind,keys,arg):
+    """
+    Boolean mask of a predicate over an Arrow table; nulls never match.
+    """
+    def per_chunk(col,func):
+        # Dictionary columns are tested on their dictionaries only.
+        if pa.types.is_dictionary(col.type):
+            masks = [pc.take(func(x.dictionary),x.indices) for x in col.chunks]
+            return pa.chunked_array(masks,type=pa.bool_())
+        return func(col)
+
+    if kind == 'notnull':
+        masks = [pc.is_valid(table[key]) for key in keys]
+        mask  = masks[0]
+        for other in masks[1:]:
+            mask = pc.and_(mask,other)
+        return mask
+
+    col = table[keys[0]]
+    if kind == 'isin':
+        value_type  = col.type.value_type if pa.types.is_dictionary(col.type) else col.type
+        value_set   = pa.array(arg).cast(value_type)
+        mask        = per_chunk(col,lambda x: pc.is_in(x,value_set=value_set))
+    elif kind == 'range':
+        start, stop = [pa.scalar(pd.Timestamp(x).to_pydatetime(),type=col.type) for x in arg]
+        mask        = pc.and_(pc.greater_equal(col,start),pc.less(col,stop))
+    elif kind == 'min_len':
+        masks       = [per_chunk(table[key],lambda x: pc.greater_equal(pc.utf8_length(x),arg)) for key in keys]
+        mask        = masks[0]
+        for other in masks[1:]:
+            mask = pc.and_(mask,other)
+    return pc.fill_null(mask,False)
+
+def pandas_mask(df,kind,keys,arg):
+    """
+    Boolean mask of a predicate over a DataFrame (see arrow_mask).
+    """
+    if kind == 'notnull':
+        return df[keys].notnull().all(axis=1).values
+    if kind == 'isin':
+        return df[keys[0]].isin(arg).values
+    if kind == 'range':
+        col = df[keys[0]]
+        return np.logical_and(col >= pd.Timestamp(arg[0]),col < pd.Timestamp(arg[1])).values
+    if kind == 'min_len':
+        return np.logical_and.reduce([encoding.str_len(df[key]) >= arg for key in keys])
+
+def read_filtered(path=csv_path,columns=None,sources=None,calls=None,bands=None,time_range=None,
+        scrub=False,cache_dir=cache_dir,use_cache=True,chunk_size=1000000,call_key='call_1',verbose=True):
+    """
+    Read only the rows and columns of the SEQP input that pass the given
+    predicates:
+        sources:    values of `source`.
+        calls:      values of `call_key`: call_1 (the spotted station) or
+                    call_0 (the logging station).
+        bands:      values of `band`.
+        time_range: (start, stop) datetimes, start inclusive.
+        scrub:      required fields present and grid squares of at least 4
+                    characters (the scrub rules of filters.FilterPipeline).
+    `columns` projects the result onto these columns (all if None).
+
+    With the columnar cache the predicates run on the memory-mapped Arrow
+    table, so rejected rows and unused columns are never converted to
+    pandas. Without it the CSV is read in chunks of `chunk_size` rows and
+    each chunk is filtered before it is kept.
+
+    Returns (df, report); report holds the rows read and the rows removed by
+    each predicate, in the order they are applied. The cache is built with
+    a notice if `verbose` (see cache_file).
+    """
+    preds   = predicates(sources,calls,bands,time_range,scrub,call_key)
+    needed  = None
+    if columns is not None:
+        needed = list(OrderedDict.fromkeys(list(columns) + [k for x in preds.values() for k in x[1]]))
+
+    report  = OrderedDict()
+    fpath   = columnar_cache(path,cache_dir,use_cache,verbose)
+    if fpath is not None:
+        table   = feather.read_table(fpath,columns=needed,memory_map=True)
+        report['rows_read'] = table.num_rows
+        for name, (kind, keys, arg) in preds.items():
+            n_rows          = table.num_rows
+            table           = table.filter(arrow_mask(table,kind,keys,arg))
+            report[name]    = n_rows - table.num_rows
+        if columns is not None:
+            table   = table.select(list(columns))
+        df      = encoding.encode(table.to_pandas())
+    else:
+        usecols = None
+        if needed is not None:
+            usecols = [x for x in needed if x not in encoding.derived_columns]
+            for key, derived in zip(encoding.grid_columns,encoding.derived_columns):
+                if derived in needed and key not in usecols:
+                    usecols.append(key)
+        report['rows_read'] = 0
+        for name in preds:
+            report[name] = 0
+        parts, dtypes = [], OrderedDict()
+        parse_dates = ['datetime'] if usecols is None or 'datetime' in usecols else False
+        for chunk in pd.read_csv(path,usecols=usecols,parse_dates=parse_dates,chunksize=chunk_size):
+            for key, dtype in chunk.dtypes.items():
+                dtypes.setdefault(key,[]).append(dtype)
+            report['rows_read'] += len(chunk)
+            for name, (kind, keys, arg) in preds.items():
+                n_rows          = len(chunk)
+                chunk           = chunk[pandas_mask(chunk,kind,keys,arg)]
+                report[name]    += n_rows - len(chunk)
+            if len(chunk) or len(parts) == 0:
+                parts.append(chunk)
+        df      = pd.concat(parts,ignore_index=True)
+        for key, dtype_list in dtypes.items():
+            dtype = common_dtype(dtype_list)
+            if df[key].dtype != dtype:
+                df[key] = df[key].astype(dtype)
+        df      = encoding.encode(df)
+        if columns is not None:
+            df  = df[list(columns)]
+    report['rows_out'] = len(df)
+    return df, report
+
+def print_report(report):
+    """
+    Print the rows removed by each predicate of read_filtered().
+    """
+    print('  --> {:d} rows read'.format(report['rows_read']))
+    for name, count in report.items():
+        if name not in ['rows_read','rows_out']:
+            print('  --> {!s}: {:d} rows removed'.format(name,count))
+    print('  --> {:d} rows kept'.format(report['rows_out']))
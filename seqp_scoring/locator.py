@@ -0,0 +1,93 @@
+"""
+Maidenhead grid square to latitude/longitude conversion.
+
+grids2latlon() converts whole columns at once: the distinct grid squares are
+found first (free for categorical columns) and only those are converted with
+NumPy array arithmetic, then broadcast back to the rows. gridsquare2latlon()
+is the scalar version, with a bounded LRU cache.
+
+Both accept 4-character (square) and 6-character (subsquare) locators in
+any case and return the center of the square unless position='sw' asks for
+its south-west corner.
+"""
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+def grid_case(grid):
+    """
+    Correct case of grid squares.
+    """
+    try:
+        grid = grid[:2].upper() + grid[2:]
+        grid = grid[:-2] + grid[-2:].lower()
+    except (TypeError, AttributeError):
+        pass
+    return grid
+
+def _convert(grids,position='center'):
+    """
+    Convert an array of grid square strings. Returns lat, lon, valid.
+    """
+    grids   = [x if isinstance(x,str) and x.isascii() else '' for x in grids]
+    grids   = np.char.upper(np.asarray(grids,dtype='U7'))
+    lens    = np.char.str_len(grids)
+    chars   = np.frombuffer(grids.astype('S6').tobytes(),dtype=np.uint8).reshape(-1,6).astype(np.int16)
+    if len(grids) == 0:
+        chars = np.zeros((0,6),dtype=np.int16)
+
+    field   = chars[:,:2] - ord('A')
+    square  = chars[:,2:4] - ord('0')
+    subsq   = chars[:,4:6] - ord('A')
+    six     = lens == 6
+
+    valid   = np.logical_or(lens == 4,six)
+    valid  &= np.logical_and(field >= 0,field < 18).all(axis=1)
+    valid  &= np.logical_and(square >= 0,square < 10).all(axis=1)
+    valid  &= np.logical_or(~six,np.logical_and(subsq >= 0,subsq < 24).all(axis=1))
+
+    lon     = field[:,0]*20. - 180. + square[:,0]*2.
+    lat     = field[:,1]*10. -  90. + square[:,1]*1.
+    lon     = np.where(six,lon + subsq[:,0]*(2./24),lon)
+    lat     = np.where(six,lat + subsq[:,1]*(1./24),lat)
+    if position == 'center':
+        lon = lon + np.where(six,1./24,1.)
+        lat = lat + np.where(six,1./48,0.5)
+
+    lat[~valid] = np.nan
+    lon[~valid] = np.nan
+    return lat, lon, valid
+
+def grids2latlon(grids,position='center'):
+    """
+    Convert a column of grid squares to latitude and longitude.
+
+    Returns float arrays lat and lon (NaN where invalid) and a boolean
+    validity mask. Missing and malformed grid squares are invalid.
+    """
+    if isinstance(getattr(grids,'dtype',None),pd.CategoricalDtype):
+        codes   = np.asarray(grids.cat.codes)
+        uniques = np.asarray(grids.cat.categories,dtype=object)
+    else:
+        codes, uniques = pd.factorize(np.asarray(grids,dtype=object))
+        uniques = np.asarray(uniques,dtype=object)
+
+    lat, lon, valid = _convert(uniques,position)
+
+    # Code -1 (missing) picks the appended invalid entry.
+    lat     = np.append(lat,np.nan)[codes]
+    lon     = np.append(lon,np.nan)[codes]
+    valid   = np.append(valid,False)[codes]
+    return lat, lon, valid
+
+@lru_cache(maxsize=65536)
+def gridsquare2latlon(grid,position='center'):
+    """
+    Latitude and longitude of one grid square. Raises ValueError if the grid
+    square is malformed.
+    """
+    lat, lon, valid = _convert([grid],position)
+    if not valid[0]:
+        raise ValueError('Invalid grid square: {!r}'.format(grid))
+    return float(lat[0]), float(lon[0])
@@ -0,0 +1,149 @@
+"""
+Per-call scoring, serially or sharded across a process pool.
+
+Once df_seqp is sorted by ['call_0','datetime'] every call's log is a
+contiguous block of rows that can be scored on its own: validity filters,
+dupes, QSO points, grid multipliers and the drop breakdown. The
+parallel mode cuts df_seqp into contiguous callsign shards and hands each one
+to a worker as an Arrow IPC file that the worker memory-maps, so no
+DataFrame is pickled. Every shard goes through the same code as a serial
+run and the pieces are stitched back in call order, so the result is
+identical to the serial one.
+"""
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from . import encoding
+from .dupes import dupe_window, find_dupes
+from .filters import FilterPipeline
+from .index import CallIndex
+from .profiling import StageProfiler
+from .scoring import grid_multipliers, qso_points
+
+try:
+    import pyarrow.feather as feather
+except ImportError:
+    feather = None
+
+def score_calls(df_seqp,calls,bands,cw_modes,ph_modes,prof=None,
+        window=dupe_window,cw_points=2,ph_points=1):
+    """
+    Score the QSOs of `calls` in df_seqp. Each step is recorded as a stage of
+    `prof` (a StageProfiler), if given. `window` is the dupe window and
+    cw_points/ph_points the QSO points of RULE 1.
+
+    Returns (df_score, df_drop, counts, valid):
+        df_score:   dupes, QSO and grid square columns indexed by `calls`.
+        df_drop:    QSOs dropped per call and filter rule.
+        counts:     QSOs dropped per filter rule.
+        valid:      boolean mask of the valid QSOs in df_seqp.
+    """
+    if prof is None:
+        prof = StageProfiler()
+    valid_modes = cw_modes + ph_modes
+
+    st          = prof.start('dupes',rows_in=len(df_seqp))
+    qso_filter  = FilterPipeline(df_seqp).required().grid_length().valid_mode(valid_modes)
+    dupe, dupes = find_dupes(df_seqp,calls,bands,valid_modes,window=window,mask=qso_filter.mask)
+    qso_filter.not_dupe(dupe)
+    dft         = qso_filter.selection()
+    prof.stop(st,rows_out=len(dft))
+
+    st          = prof.start('scoring',rows_in=len(dft))
+    df_score    = qso_points(dft,calls,cw_modes,ph_modes,cw_points,ph_points)
+    df_score.insert(0,'dupes',dupes.values)
+    prof.stop(st,rows_out=len(df_score))
+
+    st          = prof.start('grid_multipliers',rows_in=len(dft))
+    df_score    = df_score.join(grid_multipliers(dft,calls,bands))
+    prof.stop(st,rows_out=len(df_score))
+
+    # The counts are cross-checked afterwards by reconcile.reconcile().
+    st          = prof.start('drop_breakdown',rows_in=len(df_seqp))
+    df_drop     = qso_filter.breakdown(index=calls)
+    prof.stop(st,rows_out=len(df_drop))
+    return df_score, df_drop, qso_filter.counts(), qso_filter.mask
+
+def shard_bounds(index,calls,n_shards):
+    """
+    Split the rows of `calls` in the frame of `index` (a CallIndex) into at
+    most n_shards contiguous (start, stop, calls) blocks of about the same
+    number of rows, never splitting a call.
+    """
+    calls   = pd.Index(calls)
+    pos     = index.calls.get_indexer(calls)
+    pos     = pos[pos >= 0]
+    if len(pos) == 0:
+        return []
+    start, stop = index.starts[pos].min(), index.stops[pos].max()
+    # Rows where a new call starts inside [start, stop).
+    inside  = (index.starts >= start) & (index.starts < stop)
+    edges   = np.concatenate([index.starts[inside]-start,[stop-start]])
+
+    targets = np.linspace(0,stop-start,n_shards+1)[1:-1]
+    cuts    = np.unique(np.concatenate([[0],edges[np.searchsorted(edges,targets)],[stop-start]]))
+
+    shards  = []
+    for s_0, s_1 in zip(cuts[:-1],cuts[1:]):
+        in_shard    = (index.starts >= start+s_0) & (index.starts < start+s_1)
+        shard_calls = calls[calls.isin(index.calls[in_shard])]
+        shards.append((start+s_0,start+s_1,shard_calls))
+    return shards
+
+def score_shard_file(fpath,calls,bands,cw_modes,ph_modes,opts):
+    """
+    Worker entry point: memory-map one shard and score it.
+    """
+    df_shard = encoding.encode(feather.read_table(fpath,memory_map=True).to_pandas())
+    return score_calls(df_shard,calls,bands,cw_modes,ph_modes,**opts)
+
+def score_calls_parallel(df_seqp,calls,bands,cw_modes,ph_modes,workers,index=None,verbose=True,**opts):
+    """
+    Same as score_calls, with the work split into callsign shards scored by
+    a pool of `workers` processes. df_seqp must be sorted by
+    ['call_0','datetime'] and have a RangeIndex. `opts` are passed on to
+    score_calls. Without pyarrow the calls are scored serially, with a
+    notice if `verbose`.
+    """
+    if index is None:
+        index = CallIndex(df_seqp)
+    if feather is None:
+        if verbose:
+            print('pyarrow is not installed; scoring serially.')
+        return score_calls(df_seqp,calls,bands,cw_modes,ph_modes,**opts)
+
+    shards  = shard_bounds(index,calls,workers*4)
+    if len(shards) == 0:
+        return score_calls(df_seqp,calls,bands,cw_modes,ph_modes,**opts)
+    tmp_dir = tempfile.mkdtemp(prefix='seqp_shards_')
+    try:
+        futures = []
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for inx, (start, stop, shard_calls) in enumerate(shards):
+                fpath = os.path.join(tmp_dir,'{:05d}.arrow'.format(inx))
+                df_seqp.iloc[start:stop].reset_index(drop=True).to_feather(fpath,compression='uncompressed')
+                futures.append(pool.submit(score_shard_file,fpath,shard_calls,bands,cw_modes,ph_modes,opts))
+            results = [x.result() for x in futures]
+    finally:
+        shutil.rmtree(tmp_dir)
+
+    # Rows outside the shards belong to no scored call; charge them as if
+    # scored serially so the drop counts match.
+    valid_modes = cw_modes + ph_modes
+    outside     = np.ones(len(df_seqp),dtype=bool)
+    valid       = np.zeros(len(df_seqp),dtype=bool)
+    for (start, stop, shard_calls), result in zip(shards,results):
+        outside[start:stop] = False
+        valid[start:stop]   = result[3]
+    rest        = FilterPipeline(df_seqp[outside]).required().grid_length().valid_mode(valid_modes)
+    valid[outside] = rest.mask
+
+    df_score    = pd.concat([x[0] for x in results]).reindex(calls)
+    df_drop     = pd.concat([x[1] for x in results]).reindex(calls)
+    counts      = sum([x[2] for x in results],rest.counts().reindex(results[0][2].index,fill_value=0))
+    return df_score, df_drop, counts, valid
@@ -0,0 +1,579 @@
+"""
+The scoring pipeline as callable stages.
+
+Pipeline.run() is what `seqp-scoring score` (and seqp-scoring.py) runs: read
+the seqp_logs QSOs, build the call table, export the QSOs per mode, score
+each call, reconcile the counts, add the bonuses and write seqp_scores.csv.
+Every stage is checkpointed (see checkpoint.py) and profiled (see
+profiling.py).
+
+Pipeline.score_call() scores a few calls without touching the rest of the
+input or writing any files. A long-running process can build one Pipeline
+and call either of them repeatedly; the submissions are loaded only once.
+
+Pipeline.rescore() applies late or corrected logs to the state saved by the
+last run() and rescores only their calls (see incremental.py).
+"""
+import datetime
+import os
+from collections import OrderedDict
+from datetime import datetime as dt
+
+import pandas as pd
+
+from . import chunked, incremental, ingest
+from .bonuses import submission_bonuses
+from .checkpoint import Checkpoints
+from .defaults import cache_dir, checkpoint_dir, csv_path, mode_formats, snapshot_modes, state_dir
+from .export import export_modes
+from .filters import FilterPipeline
+from .index import CallIndex
+from .parallel import score_calls, score_calls_parallel
+from .profiling import StageProfiler
+from .reconcile import reconcile, report_columns
+from .rules import RuleSet
+from .scoring import call_table, score_columns, totals
+from .snapshot import load_submissions
+from .spots import bin_spots, spot_bonus
+
+scores_path         = 'seqp_scores.csv'
+drops_path          = 'seqp_drops.csv'
+discrepancy_path    = 'seqp_discrepancies.csv'
+profile_path        = 'seqp_scores_profile.json'
+cprofile_dir        = 'seqp_scores_cprofile'
+modes_dir           = 'modes'
+
+class Pipeline(object):
+    """
+    Scores the SEQP input at `path` under `rules` (a RuleSet, the published
+    rules if None).
+
+    cache_dir, use_cache:       the columnar cache (see ingest.py).
+    db_config, db_snapshot:     the hamsci_rsrch database and snapshot mode
+                                (see db.py and snapshot.py).
+    checkpoint_dir, checkpoints: stage checkpoints (see checkpoint.py).
+    chunk_size:                 stream the input this many rows at a time
+                                (see chunked.py). The input is also streamed,
+                                in chunks of chunked.chunk_size, when it has
+                                no columnar cache.
+    workers:                    processes for per-call scoring.
+    mode_format, export_threads: the per-mode files (see export.py).
+    out_dir:                    where the output files are written.
+    state_dir:                  where run() saves the state rescore() starts
+                                from (see incremental.py); None saves none.
+    profile, cprofile:          write the stage profile (see profiling.py).
+    verbose:                    print progress.
+    """
+    def __init__(self,path=csv_path,rules=None,cache_dir=cache_dir,use_cache=True,db_config=None,
+            db_snapshot='auto',checkpoint_dir=checkpoint_dir,checkpoints=True,chunk_size=None,workers=1,
+            mode_format='csv',export_threads=4,out_dir='.',state_dir=state_dir,profile=False,cprofile=False,
+            verbose=True):
+        if mode_format not in mode_formats:
+            raise ValueError('Unknown mode export format {!r}; use one of {!s}.'.format(mode_format,mode_formats))
+        if db_snapshot not in snapshot_modes:
+            raise ValueError('Unknown snapshot mode {!r}; use one of {!s}.'.format(db_snapshot,snapshot_modes))
+        self.path           = path
+        self.rules          = RuleSet() if rules is None else rules
+        self.cache_dir      = cache_dir
+        self.use_cache      = use_cache
+        self.db_config      = db_config
+        self.db_snapshot    = db_snapshot
+        self.checkpoint_dir = checkpoint_dir
+        self.checkpoints    = checkpoints
+        self.chunk_size     = chunk_size
+        self.workers        = workers
+        self.mode_format    = mode_format
+        self.export_threads = export_threads
+        self.out_dir        = out_dir
+        self.state_dir      = state_dir
+        self.profile        = profile
+        self.cprofile       = cprofile
+        self.verbose        = verbose
+        self.df_sub         = None
+        self.frames         = {}
+
+    def log(self,msg):
+        if self.verbose:
+            print(msg)
+
+    def out_path(self,name):
+        return os.path.join(self.out_dir,name)
+
+    # -------------------------------------------------------------------------
+    # Reading the input.
+    # -------------------------------------------------------------------------
+
+    def read_filtered(self,**preds):
+        """
+        ingest.read_filtered() on the input, printing the predicate report.
+        """
+        df, report = ingest.read_filtered(self.path,cache_dir=self.cache_dir,use_cache=self.use_cache,
+                        verbose=self.verbose,**preds)
+        if self.verbose:
+            ingest.print_report(report)
+        return df
+
+    def columnar(self):
+        """
+        Whether the input has a columnar cache (see ingest.columnar_cache).
+        Without one every read_filtered() parses the whole CSV, so the input
+        is streamed once with scan_chunks() instead.
+        """
+        if 'cache' not in self.frames:
+            self.frames['cache'] = ingest.columnar_cache(self.path,self.cache_dir,self.use_cache,self.verbose)
+        return self.frames['cache'] is not None
+
+    def scan_chunks(self):
+        """
+        Stream the input once (see chunked.scan) and keep the QSOs and the
+        binned spots for the rest of the run.
+        """
+        if 'spots' not in self.frames:
+            rules = self.rules
+            self.frames['seqp'], self.frames['spots'] = chunked.scan(self.path,rules.sTime,rules.bands,
+                    rules.sources,rules.spot_hours,chunk_size=self.chunk_size or chunked.chunk_size,
+                    verbose=self.verbose)
+        return self.frames['seqp'], self.frames['spots']
+
+    def read_seqp_logs(self,calls=None):
+        """
+        The seqp_logs QSOs (of `calls` only, if given) sorted by
+        ['call_0','datetime'].
+        """
+        if (self.chunk_size and calls is None) or not self.columnar():
+            df_seqp = self.scan_chunks()[0]
+            if calls is not None:
+                df_seqp = df_seqp[df_seqp['call_0'].isin([str(x) for x in calls]).values]
+        else:
+            df_seqp = self.read_filtered(sources=['seqp_logs'],calls=calls,call_key='call_0')
+        return df_seqp.sort_values(by = ['call_0', 'datetime']).reset_index(drop = True)
+
+    def submissions(self):
+        """
+        The submissions of the bonus tables, loaded once per Pipeline.
+        """
+        if self.df_sub is None:
+            self.df_sub = load_submissions(self.db_config,self.db_snapshot,verbose=self.verbose)
+        return self.df_sub
+
+    # -------------------------------------------------------------------------
+    # Stages.
+    # -------------------------------------------------------------------------
+
+    def score_qsos(self,df_seqp,calls,prof=None,index=None):
+        """
+        Per-call scoring (see parallel.score_calls): drop QSOs without valid
+        modes, flag dupes, RULE 1 points and RULE 2 grid squares.
+        """
+        rules   = self.rules
+        opts    = dict(window=rules.dupe_window,cw_points=rules.cw_points,ph_points=rules.ph_points)
+        if self.workers > 1:
+            # The workers' stages are not broken out; child_cpu_s of the
+            # enclosing stage covers the pool.
+            return score_calls_parallel(df_seqp,calls,rules.bands,rules.cw_modes,rules.ph_modes,
+                    self.workers,index=index,verbose=self.verbose,**opts)
+        return score_calls(df_seqp,calls,rules.bands,rules.cw_modes,rules.ph_modes,prof=prof,**opts)
+
+    def operating_bonuses(self,df_out):
+        """
+        BONUS 1-3: every scored call gets the operating bonuses.
+        """
+        for key in ['operated_totality','operated_outdoors','operated_public']:
+            df_out[key] = self.rules.operated_bonus
+        return df_out
+
+    def submission_bonuses(self,df_out,df_sub):
+        """
+        BONUS 4-8 from the submissions of the calls in df_out.
+        """
+        df_bonus = submission_bonuses(df_sub,df_out['call'],self.rules.bonus_values)
+        return df_out.drop(columns=df_bonus.columns).join(df_bonus,on='call')
+
+    def spot_bins(self,calls):
+        """
+        The distinct binned spots of `calls` (see chunked.bin_keys), with
+        object columns so that bins of different reads can be combined.
+        """
+        rules = self.rules
+        if self.chunk_size or not self.columnar():
+            df_bin = self.scan_chunks()[1].bins
+            if df_bin is None:
+                return pd.DataFrame(columns=chunked.bin_keys)
+            return df_bin[df_bin['call_1'].isin(calls)].reset_index(drop=True)
+        # Only scrubbed spots of scored calls on the contest bands inside the
+        # spot window can score.
+        eTime       = rules.sTime + datetime.timedelta(hours=rules.spot_hours)
+        df_spots    = self.read_filtered(columns=['source','call_1','band','datetime','grid_0','grid_0_4char'],
+                        sources=rules.sources,calls=calls,bands=rules.bands,
+                        time_range=(rules.sTime,eTime),scrub=True)
+        df_bin      = bin_spots(df_spots,rules.sTime,calls,rules.bands,rules.sources,hours=rules.spot_hours)
+        df_bin      = df_bin.astype({x:object for x in ['source','call_1','grid_0_4char']})
+        return df_bin.drop_duplicates(chunked.bin_keys,ignore_index=True)
+
+    def spot_bonus(self,df_bin,calls,grids):
+        """
+        BONUS 9: spot bonus points of `calls` per source, from their binned
+        spots.
+        """
+        return spot_bonus(df_bin,calls,grids,self.rules.sources)
+
+    def finish(self,df_out):
+        """
+        Grand totals, with the columns in their published order.
+        """
+        rules   = self.rules
+        df_out  = totals(df_out,rules.bands,rules.sources)
+        return df_out[score_columns(rules.bands,rules.sources)].copy()
+
+    # -------------------------------------------------------------------------
+    # Scoring a few calls.
+    # -------------------------------------------------------------------------
+
+    def score_frame(self,df_seqp,df_bin=None):
+        """
+        Score every call in df_seqp (sorted seqp_logs QSOs) the way run()
+        does, without checkpoints or files. df_bin holds the binned spots of
+        the calls (see spot_bins); they are read from the input if None.
+
+        Returns (df_out, df_drop, df_disc): the score rows, the QSOs dropped
+        per call and rule and the reconcile discrepancies.
+        """
+        rules   = self.rules
+        index   = CallIndex(df_seqp)
+        df_out  = call_table(df_seqp,index,rules.bands,rules.sources,verbose=False)
+        if len(df_out) == 0:
+            df_out  = pd.DataFrame(columns=score_columns(rules.bands,rules.sources))
+            df_drop = pd.DataFrame(index=pd.Index([],name='call'))
+            return df_out, df_drop, pd.DataFrame(columns=report_columns)
+
+        df_score, df_drop, drop_counts, valid = self.score_qsos(df_seqp,df_out['call'],index=index)
+        df_out  = df_out.drop(columns=df_score.columns,errors='ignore').join(df_score,on='call')
+        df_disc = reconcile(df_out,df_drop,index.filter(valid),rules.bands)
+        df_out  = self.operating_bonuses(df_out)
+        df_out  = self.submission_bonuses(df_out,self.submissions())
+        if df_bin is None:
+            df_bin = self.spot_bins(df_out['call'])
+        df_spot = self.spot_bonus(df_bin,df_out['call'],df_out['grid'])
+        df_out  = df_out.drop(columns=rules.sources).join(df_spot,on='call')
+        return self.finish(df_out), df_drop, df_disc
+
+    def score_call(self,calls):
+        """
+        Score only `calls` (a call or a list of calls), reading only their
+        QSOs and spots. Nothing is written and no checkpoints are used. The
+        rows equal those of the same calls in run().
+        """
+        if isinstance(calls,str):
+            calls = [calls]
+        return self.score_frame(self.read_seqp_logs(calls=calls))[0]
+
+    # -------------------------------------------------------------------------
+    # Late and corrected logs.
+    # -------------------------------------------------------------------------
+
+    def rescore(self,delta_path,append=False):
+        """
+        Rescore after late or corrected logs (see incremental.py).
+        delta_path is a CSV of seqp_logs rows in the format of the input;
+        every call in it gets its QSOs replaced by the delta's, or extended
+        by them if `append`. Only those calls are scored again.
+        seqp_scores.csv, seqp_drops.csv and seqp_discrepancies.csv in out_dir
+        are patched and the state is updated, so deltas can be chained.
+
+        Returns (df_out, df_disc, calls): the patched score table and
+        discrepancies and the rescored calls.
+        """
+        rules           = self.rules
+        tables, meta    = incremental.load_state(self.state_dir)
+        incremental.check_state(meta,rules,ingest.source_key(self.path,self.cache_dir))
+
+        df_delta        = incremental.read_delta(delta_path,verbose=self.verbose)
+        df_qsos, calls  = incremental.apply_delta(tables['qsos'],df_delta,append)
+        self.log('Rescoring {:d} calls from {!s}...'.format(len(calls),delta_path))
+
+        # The spots of calls scored before come from the saved bins; only
+        # the spots of new calls are read.
+        df_bin      = tables['spots']
+        spot_calls  = meta['spot_calls']
+        known       = set(spot_calls)
+        new_calls   = [x for x in calls if x not in known]
+        if len(new_calls):
+            df_bin      = pd.concat([df_bin,self.spot_bins(new_calls)],ignore_index=True)
+            spot_calls  = spot_calls + new_calls
+
+        df_seqp = df_qsos[df_qsos['call_0'].isin(calls).values].reset_index(drop=True)
+        df_new, df_drop, df_disc = self.score_frame(df_seqp,df_bin[df_bin['call_1'].isin(calls).values])
+
+        df_out  = incremental.patch_scores(tables['scores'],df_new,calls)
+        df_drop = incremental.patch_drops(tables['drops'],df_drop,calls)
+        df_disc = incremental.patch_discrepancies(tables['discrepancies'],df_disc,calls,rules.bands)
+        os.makedirs(self.out_dir,exist_ok=True)
+        df_out.to_csv(self.out_path(scores_path),index=False)
+        df_drop.to_csv(self.out_path(drops_path))
+        df_disc.to_csv(self.out_path(discrepancy_path),index=False)
+        self.log('  --> {:d} calls rescored, {!s} patched'.format(len(df_new),self.out_path(scores_path)))
+
+        tables['qsos']          = df_qsos
+        tables['scores']        = df_out
+        tables['drops']         = df_drop
+        tables['discrepancies'] = df_disc
+        tables['spots']         = df_bin
+        meta['spot_calls']      = spot_calls
+        incremental.save_state(tables,meta,self.state_dir)
+        return df_out, df_disc, calls
+
+    # -------------------------------------------------------------------------
+    # The full run.
+    # -------------------------------------------------------------------------
+
+    def run(self,prof=None):
+        """
+        Score every call and write seqp_scores.csv, seqp_drops.csv,
+        seqp_discrepancies.csv and the modes/ directory to out_dir. Returns
+        (df_out, df_disc): the score table and the reconcile discrepancies.
+        The stages are recorded in `prof`, a StageProfiler, if given.
+        """
+        rules   = self.rules
+        params  = rules.params()
+        sources = rules.sources
+        log     = self.log
+        if prof is None:
+            prof = StageProfiler(tracemalloc=self.profile,
+                    cprofile_dir=self.out_path(cprofile_dir) if self.cprofile else None)
+        self.frames = {}
+        os.makedirs(self.out_dir,exist_ok=True)
+
+        # ---------------------------------------------------------------------
+        # Read in a CSV, remove any QSOs not from seqp_logs, then sort the QSOs.
+        #
+        # Stage outputs are checkpointed under keys chained from the input's
+        # SHA-1 and the rules each stage depends on (see checkpoint.py), so a
+        # rerun only recomputes the stages downstream of whatever changed.
+        #
+        # The input is never loaded whole: each stage reads only the rows and
+        # columns it can use (see ingest.read_filtered). With chunk_size, or
+        # without the columnar cache, the CSV is streamed once instead (see
+        # chunked.py): only the QSOs and the distinct binned spots are kept.
+        # ---------------------------------------------------------------------
+        ckpt    = Checkpoints(self.checkpoint_dir,enabled=self.checkpoints)
+        st      = prof.start('ingest')
+        os.makedirs(self.cache_dir,exist_ok=True)
+        k_src   = ingest.source_key(self.path,self.cache_dir)
+        k_seqp  = ckpt.key('seqp',k_src)
+        df_seqp = ckpt.run('seqp',k_seqp,self.read_seqp_logs,prof=prof,rows_out=len)
+        prof.stop(st,rows_out=len(df_seqp))
+        log('CSV read in complete...')
+
+        # ---------------------------------------------------------------------
+        # Create a new DataFrame with the unique callsigns from column call_0.
+        # Additionally, compute the number of submitted QSOs per callsign.
+        # call_index maps every call to its contiguous block of rows in df_seqp.
+        # ---------------------------------------------------------------------
+        st          = prof.start('call_index',rows_in=len(df_seqp))
+        call_index  = CallIndex(df_seqp)
+        prof.stop(st,rows_out=len(call_index))
+        k_calls     = ckpt.key('call_table',k_seqp,bands=rules.bands,sources=sources)
+        df_out      = ckpt.run('call_table',k_calls,
+                        lambda: call_table(df_seqp,call_index,rules.bands,sources,verbose=self.verbose),
+                        prof=prof,rows_in=len(df_seqp),rows_out=len)
+        log('Output DataFrame created...')
+
+        # ---------------------------------------------------------------------
+        # Remove any QSOs that are missing/invalid for the following: call_1,
+        # mode, band, datetime, grid_0, grid_1.
+        # ---------------------------------------------------------------------
+        log('Dropping QSOs with null Required Fields...')
+        log('Dropping QSOs with < 4 character grid squares...')
+        k_scrub     = ckpt.key('scrub',k_seqp)
+        scrub_mask  = ckpt.run('scrub',k_scrub,lambda: FilterPipeline(df_seqp).required().grid_length().mask,
+                        prof=prof,rows_in=len(df_seqp),rows_out=lambda x: int(x.sum()))
+
+        log('Saving QSO Mode Summary and QSO by Mode files...')
+        modes_path  = self.out_path(modes_dir)
+        k_modes     = ckpt.key('mode_export',k_scrub,fmt=self.mode_format)
+        df_mode     = ckpt.run('mode_export',k_modes,
+                        lambda: export_modes(df_seqp,modes_path,fmt=self.mode_format,mask=scrub_mask,
+                            threads=self.export_threads,verbose=self.verbose),
+                        outputs=[os.path.join(modes_path,'000_mode_summary.csv')],
+                        prof=prof,rows_in=int(scrub_mask.sum()),rows_out=lambda x: int(x['count'].sum()))
+
+        # These are all of the modes that have been submitted:
+        #modes     =   ['CW', 'PH', 'RY', 'FT', 'PK', 'PS', 'JT', 'RT', 'US', 'JT65', 'DG', 'DI', 'FM', 'OT', 'FT8', 'HE', 'SSB', 'VO', 'DA', 'PSK31']
+
+        # The accepted modes according to published rules are rules.cw_modes
+        # (CW, RY, FT, PK, JT) and rules.ph_modes (PH); see rules.py.
+
+        # ---------------------------------------------------------------------
+        # Per-call scoring (see parallel.py):
+        #   - Drop QSOs without valid modes.
+        #   - DUPES
+        #     "Duplicate contacts on the same band and mode as a previous QSO
+        #      with a station are allowed after 10 minutes have elapsed since
+        #      the previous QSO with that station. The same station may be
+        #      worked on all SEQP bands and modes."
+        #   - RULE 1: Add 1 point for a Phone QSO. Add 2 points for a
+        #     CW/Digital QSO.
+        #   - RULE 2: 4-character grid squares are counted once per band.
+        # ---------------------------------------------------------------------
+        log('Dropping QSOs without valid modes, checking for dupes and scoring valid QSOs...')
+        k_score = ckpt.key('per_call_scoring',k_calls,
+                    **{x:params[x] for x in ['bands','cw_modes','ph_modes','cw_points','ph_points','dupe_window']})
+        result  = ckpt.run('per_call_scoring',k_score,
+                    lambda: self.score_qsos(df_seqp,df_out['call'],prof=prof,index=call_index),
+                    prof=prof,rows_in=len(df_seqp),rows_out=lambda x: int(x[3].sum()))
+        df_score, df_drop, drop_counts, valid = result
+        for rule, count in drop_counts.items():
+            log('  --> {!s}: {:d} QSOs dropped'.format(rule,count))
+
+        df_qsos     = df_seqp
+        df_seqp     = df_seqp[valid]
+        call_index  = call_index.filter(valid)
+        df_out      = df_out.drop(columns=df_score.columns,errors='ignore')
+        df_out      = df_out.join(df_score,on='call')
+
+        # ---------------------------------------------------------------------
+        # Reconcile the per-call counts with the QSOs (see reconcile.py).
+        # Discrepancies are written to seqp_discrepancies.csv instead of
+        # stopping.
+        # ---------------------------------------------------------------------
+        disc_path   = self.out_path(discrepancy_path)
+        st          = prof.start('reconcile',rows_in=len(df_out))
+        df_disc     = reconcile(df_out,df_drop,call_index,rules.bands)
+        df_disc.to_csv(disc_path,index=False)
+        if len(df_disc):
+            log('  --> {:d} discrepancies in {:d} calls, see {!s}'.format(len(df_disc),df_disc['call'].nunique(),disc_path))
+            log(df_disc.groupby('check').size().to_string())
+        else:
+            log('  --> All per-call counts reconcile.')
+        prof.stop(st,rows_out=len(df_disc))
+
+        # ---------------------------------------------------------------------
+        # BONUS 1-3: Add 100 * 3 points to any callsign listed in df_out.
+        # "1. Operated during totality (or the time of greatest shadow at your
+        #     QTH) – add 100 points.
+        #  2. Operate outdoors (so you can see the eclipse) – add 100 points
+        #  3. Operate at a public venue – add 100 points"
+        # ---------------------------------------------------------------------
+        log('Compute Bonuses 1-3 (Totality, Outdoors, Public Venue)...')
+        st      = prof.start('bonuses_1_3',rows_in=len(df_out))
+        df_out  = self.operating_bonuses(df_out)
+        prof.stop(st,rows_out=len(df_out))
+
+        # ---------------------------------------------------------------------
+        # Load in the hamsci_rsrch database and prepare a DataFrame derived
+        # from various tables in it. The tables come from a local snapshot
+        # when the database has not changed since the last run (see
+        # db_snapshot).
+        # ---------------------------------------------------------------------
+        st      = prof.start('db_fetch')
+        df_sub  = self.submissions()
+        prof.stop(st,rows_out=len(df_sub))
+
+        log('SQL database loaded...')
+        log('Computing Bonus Rules 4-8...')
+
+        # ---------------------------------------------------------------------
+        # BONUS 4: Add 50 points if ground conductivity is greater than 0.
+        # "4. Provide ground conductivity (estimated from online conductivity
+        #     maps, see
+        #     https://www.fcc.gov/media/radio/m3-ground-conductivity-map) –
+        #     add 50 points."
+        # ---------------------------------------------------------------------
+        # BONUS 5: Add 100 points if a filename exists for a callsign in the
+        # SQL table.
+        # TODO: Blacklist?
+        # "5. Upload PDF of antenna and station design characteristics,
+        #     including information such as orientation, E and H plane
+        #     patterns, height above ground, station block diagram – add 100
+        #     points."
+        # ---------------------------------------------------------------------
+        # BONUS 6: Add 50 points per band for all submitted antennas that
+        # contain a submitted ERPD value which is greater than 0.
+        # "6. Provide Effective Radiated Power relative to a Dipole (ERPD) on
+        #     each band – add 50 points per band."
+        # ---------------------------------------------------------------------
+        # BONUS 7: Add 50 points per band and per mode for all submitted
+        # skimmers.
+        # "7. Operate a wideband RBN, PSKReporter, or WSPRNet node during the
+        #     contest
+        #       a. 50 points per band and mode (including 60, 30, 17, and 12
+        #          meters).
+        #       b. Multiple receive sites may be claimed, provided receive
+        #          sites are spaced at least 100 km apart."
+        # ---------------------------------------------------------------------
+        # BONUS 8: Add 50 points per band for all submitted Zenodo DOIs.
+        # "8. Provide wideband I/Q recordings of SEQP bands (50 points per
+        #     band). The data files should be uploaded to the HamSCI
+        #     community on zenodo.org. Follow the procedures on the Eclipse HF
+        #     Wideband Recording Experiment page for instructions and provide
+        #     a link to these data files on the SEQP log submission page."
+        # ---------------------------------------------------------------------
+
+        # Several submissions for one call: ground_conductivity and
+        # antenna_design are awarded if any submission qualifies,
+        # erpd/skimmers/iq_data come from the last submission (see
+        # bonuses.submission_bonuses).
+        st      = prof.start('bonuses_4_8',rows_in=len(df_sub))
+        df_out  = self.submission_bonuses(df_out,df_sub)
+        prof.stop(st,rows_out=len(df_out))
+
+        # ---------------------------------------------------------------------
+        # BONUS 9
+        # "9. One bonus point will be awarded for each band and clock hour
+        #     during which your signal was spotted in a grid square other than
+        #     your own by the RBN, PSKReporter, or DX spotting network. There
+        #     are eight clock hours and 7 bands available for receiving bonus
+        #     points. A spot of your signal on any mode will qualify for the
+        #     bonus point."
+        # ---------------------------------------------------------------------
+        log('Working on Bonus 9 (Spot Bonus)')
+        st      = prof.start('spot_bonus')
+        k_spot  = ckpt.key('spot_bins',k_src,k_calls,
+                    **{x:params[x] for x in ['bands','sources','sTime','spot_hours']})
+        df_bin  = ckpt.run('spot_bins',k_spot,lambda: self.spot_bins(df_out['call']),
+                    prof=prof,rows_out=len)
+        df_spot = self.spot_bonus(df_bin,df_out['call'],df_out['grid'])
+        df_out  = df_out.drop(columns=sources).join(df_spot,on='call')
+        prof.stop(st,rows_out=len(df_spot))
+
+        # ---------------------------------------------------------------------
+        # Finish calculating grand totals and reorganize the columns for
+        # proper readability.
+        # ---------------------------------------------------------------------
+        st      = prof.start('totals',rows_in=len(df_out))
+        df_out  = self.finish(df_out)
+        prof.stop(st,rows_out=len(df_out))
+        log('Completed scoring summations...')
+        log('Columns reorganized...')
+
+        # ---------------------------------------------------------------------
+        # Export the DataFrame to a CSV file, 'seqp_scores.csv'.
+        # ---------------------------------------------------------------------
+        st      = prof.start('export',rows_in=len(df_out))
+        df_out.to_csv(self.out_path(scores_path),index=False)
+        df_drop.to_csv(self.out_path(drops_path))
+        prof.stop(st,rows_out=len(df_out))
+        log('Output CSV exported successfully!')
+
+        if self.state_dir is not None:
+            tables  = OrderedDict([('qsos',df_qsos),('scores',df_out),('drops',df_drop),
+                        ('discrepancies',df_disc),('spots',df_bin)])
+            meta    = OrderedDict()
+            meta['rules']       = incremental.rules_key(rules)
+            meta['source_key']  = k_src
+            meta['input']       = os.path.abspath(self.path)
+            meta['spot_calls']  = [str(x) for x in df_spot.index]
+            incremental.save_state(tables,meta,self.state_dir)
+
+        if self.profile:
+            meta = OrderedDict()
+            meta['run_at']              = dt.now(datetime.timezone.utc).isoformat()
+            meta['input']               = os.path.abspath(self.path)
+            meta['workers']             = self.workers
+            meta['qsos']                = len(df_seqp)
+            meta['calls']               = len(df_out)
+            meta['checkpoint_hits']     = ckpt.hits
+            meta['checkpoint_misses']   = ckpt.misses
+            prof.write(self.out_path(profile_path),meta=meta)
+            log('Stage profile written to {!s}'.format(self.out_path(profile_path)))
+        return df_out, df_disc
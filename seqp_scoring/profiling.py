@@ -0,0 +1,153 @@
+"""
+Stage-level timing and memory instrumentation.
+
+    prof = StageProfiler(tracemalloc=True)
+    with prof.stage('dupes',rows_in=len(df_seqp)) as st:
+        ...
+        st['rows_out'] = len(df_seqp)
+    prof.write('seqp_scores_profile.json')
+
+Every stage records wall time, CPU time of this process and of finished
+child processes (the --workers pool), rows in and out, the RSS at the end of
+the stage with its change, the process peak RSS so far and, if tracemalloc is
+enabled, the change in traced memory and the traced peak during the stage.
+With cprofile_dir set, each stage is also run under cProfile and its stats
+are dumped to <cprofile_dir>/<stage>.prof.
+
+Stages may nest: a stage started while another is running names it as its
+parent, so the stages with no parent add up to the whole run. Only those
+are run under cProfile; the stats of a nested stage are in its parent's.
+"""
+import cProfile
+import json
+import os
+import resource
+import sys
+import time
+import tracemalloc as _tracemalloc
+from collections import OrderedDict
+from contextlib import contextmanager
+
+def current_rss():
+    """
+    Resident set size of this process in bytes (0 if unknown).
+    """
+    try:
+        with open('/proc/self/statm') as fl:
+            return int(fl.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        return 0
+
+def peak_rss():
+    """
+    Peak resident set size of this process in bytes.
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS.
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+def children_cpu():
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+class StageProfiler(object):
+    """
+    Collects one record per pipeline stage. Timing and RSS are always
+    recorded; tracemalloc and cProfile only when asked for.
+    """
+    def __init__(self,tracemalloc=False,cprofile_dir=None):
+        self.stages         = []
+        self.running        = []
+        self.tracemalloc    = tracemalloc
+        self.cprofile_dir   = cprofile_dir
+        if tracemalloc and not _tracemalloc.is_tracing():
+            _tracemalloc.start()
+        if cprofile_dir is not None:
+            os.makedirs(cprofile_dir,exist_ok=True)
+
+    def start(self,name,rows_in=None):
+        """
+        Start timing a stage; pass the returned record to stop().
+        """
+        rec = OrderedDict()
+        rec['stage']        = name
+        rec['parent']       = self.running[-1]['stage'] if self.running else None
+        rec['rows_in']      = rows_in
+        rec['rows_out']     = None
+
+        rec['_rss']         = current_rss()
+        if self.tracemalloc:
+            # tracemalloc.reset_peak() is new in Python 3.9. Before that the
+            # peak since tracing started is the baseline, so the stage peak
+            # is exact if the stage sets a new peak and an upper bound if not.
+            # The reset also clears the peak of the stages this one nests in,
+            # so they keep the peak reached so far.
+            if hasattr(_tracemalloc,'reset_peak'):
+                peak = _tracemalloc.get_traced_memory()[1]
+                for x in self.running:
+                    x['_peak'] = max(x['_peak'],peak)
+                _tracemalloc.reset_peak()
+            rec['_traced']  = _tracemalloc.get_traced_memory()[0]
+            rec['_peak']    = 0
+        rec['_profile']     = None
+        if self.cprofile_dir is not None and rec['parent'] is None:
+            rec['_profile'] = cProfile.Profile()
+        rec['_wall']        = time.perf_counter()
+        rec['_cpu']         = time.process_time()
+        rec['_child']       = children_cpu()
+        if rec['_profile'] is not None:
+            rec['_profile'].enable()
+        self.running.append(rec)
+        return rec
+
+    def stop(self,rec,rows_out=None):
+        """
+        Finish a stage started with start().
+        """
+        self.running    = [x for x in self.running if x is not rec]
+        profile = rec.pop('_profile')
+        if profile is not None:
+            profile.disable()
+            profile.dump_stats(os.path.join(self.cprofile_dir,'{!s}.prof'.format(rec['stage'])))
+        if rows_out is not None:
+            rec['rows_out']         = rows_out
+        rec['wall_s']               = time.perf_counter() - rec.pop('_wall')
+        rec['cpu_s']                = time.process_time() - rec.pop('_cpu')
+        rec['child_cpu_s']          = children_cpu() - rec.pop('_child')
+        rss                         = current_rss()
+        rec['rss_bytes']            = rss
+        rec['rss_delta_bytes']      = rss - rec.pop('_rss')
+        rec['peak_rss_bytes']       = peak_rss()
+        if self.tracemalloc:
+            traced, traced_peak     = _tracemalloc.get_traced_memory()
+            traced_peak             = max(traced_peak,rec.pop('_peak'))
+            traced_0                = rec.pop('_traced')
+            rec['traced_delta_bytes']   = traced - traced_0
+            rec['traced_peak_bytes']    = traced_peak - traced_0
+        self.stages.append(rec)
+        return rec
+
+    @contextmanager
+    def stage(self,name,rows_in=None):
+        """
+        Context manager form of start()/stop(); set rec['rows_out'] inside.
+        """
+        rec = self.start(name,rows_in)
+        try:
+            yield rec
+        finally:
+            self.stop(rec)
+
+    def write(self,fpath,meta=None):
+        """
+        Write the stage records as JSON, or as CSV if fpath ends in .csv.
+        """
+        if fpath.endswith('.csv'):
+            import pandas as pd
+            pd.DataFrame(self.stages).to_csv(fpath,index=False)
+            return
+        report = OrderedDict()
+        report['meta']      = meta or {}
+        report['stages']    = self.stages
+        with open(fpath,'w') as fl:
+            json.dump(report,fl,indent=1,default=str)
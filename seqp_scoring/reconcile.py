@@ -0,0 +1,58 @@
+"""
+Reconciliation of the per-call scores against the QSOs they came from.
+
+All invariants are checked for every call at once from grouped counts
+(CallIndex offsets), in linear time, and reported per call instead of
+stopping at the first mismatch:
+
+    qso_count:      cw_dig_qso + ph_qso == valid QSOs of the call
+    drop_balance:   qsos_submitted - dupes - other drops == valid QSOs
+    dupe_count:     dupes == QSOs dropped by the dupe rule
+    gs_<band>:      grid squares on a band <= valid QSOs on that band
+"""
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+report_columns  = ['call','check','expected','actual']
+
+def check_names(bands):
+    """
+    The checks of reconcile(), in the order they are reported.
+    """
+    return ['qso_count','drop_balance','dupe_count'] + ['gs_{:d}'.format(band) for band in bands]
+
+def reconcile(df_out,df_drop,index,bands):
+    """
+    Check the score table df_out (indexed by position, with a call column)
+    against df_drop (QSOs dropped per call and rule, see
+    FilterPipeline.breakdown) and `index`, the CallIndex of the valid QSOs.
+
+    Returns a DataFrame with one row per call and failed check: call, check,
+    expected and actual value. It is empty when everything reconciles.
+    """
+    calls       = pd.Index(df_out['call'])
+    qsos_valid  = index.sizes(calls).values
+    df_drop     = df_drop.reindex(calls,fill_value=0)
+    dupe_drops  = df_drop['dupe'].values if 'dupe' in df_drop else np.zeros(len(calls),dtype=int)
+    other_drops = df_drop.sum(axis=1).values - dupe_drops
+
+    checks = OrderedDict()
+    checks['qso_count']     = (qsos_valid, (df_out['cw_dig_qso'] + df_out['ph_qso']).values, np.equal)
+    checks['drop_balance']  = (qsos_valid, (df_out['qsos_submitted'] - df_out['dupes']).values - other_drops, np.equal)
+    checks['dupe_count']    = (dupe_drops, df_out['dupes'].values, np.equal)
+    band_qsos   = index.band_sizes(calls,bands)
+    for band in bands:
+        key = 'gs_{:d}'.format(band)
+        checks[key]         = (band_qsos[band].values, df_out[key].values, np.greater_equal)
+
+    reports = []
+    for name, (expected, actual, ok) in checks.items():
+        bad = np.logical_not(ok(expected,actual))
+        if bad.any():
+            reports.append(pd.DataFrame({'call':calls[bad],'check':name,
+                'expected':expected[bad],'actual':actual[bad]}))
+    if len(reports) == 0:
+        return pd.DataFrame(columns=report_columns)
+    return pd.concat(reports,ignore_index=True)[report_columns]
@@ -0,0 +1,130 @@
+"""
+The contest rules as one declarative object.
+
+A RuleSet holds every constant that scoring depends on: the bands, the valid
+CW/Digital and Phone modes and their QSO points, the dupe window, the bonus
+point values and the spot bonus window. RuleSet() is the published rule set;
+variants are made with replace() or read from a JSON file with
+load_rulesets(), for example:
+
+    [
+        {"name": "no_jt", "cw_modes": ["CW", "RY", "FT", "PK"]},
+        {"name": "dupe_5min", "dupe_window": 5},
+        {"name": "gc_100", "bonus_values": {"ground_conductivity": 100}}
+    ]
+
+dupe_window is given in minutes and sTime as an ISO 8601 string. A single
+rule set (say for `seqp-scoring score --rules`) is one such entry, read with
+load_ruleset().
+"""
+import copy
+import datetime
+import json
+import os
+from collections import OrderedDict
+
+from .bonuses import bonus_values
+from .dupes import dupe_window
+from .spots import spot_hours, spot_sources
+
+class RuleSet(object):
+    """
+    One set of SEQP scoring rules. Keyword arguments override the published
+    rules.
+    """
+    def __init__(self,name='published',**changes):
+        self.name           = name
+        self.bands          = [1, 3, 7, 14, 21, 28, 50]
+        self.cw_modes       = ['CW', 'RY', 'FT', 'PK', 'JT']
+        self.ph_modes       = ['PH']
+        self.cw_points      = 2
+        self.ph_points      = 1
+        self.dupe_window    = dupe_window
+        # BONUS 1-3, each.
+        self.operated_bonus = 100
+        # BONUS 4-8 (see bonuses.bonus_values).
+        self.bonus_values   = OrderedDict(bonus_values)
+        # BONUS 9
+        self.sources        = list(spot_sources)
+        self.sTime          = datetime.datetime(2017,8,21,14)
+        self.spot_hours     = spot_hours
+        self.update(changes)
+
+    def update(self,changes):
+        for key, val in changes.items():
+            if not hasattr(self,key):
+                raise KeyError('Unknown rule {!s}'.format(key))
+            if key == 'dupe_window' and not isinstance(val,datetime.timedelta):
+                val = datetime.timedelta(minutes=val)
+            elif key == 'sTime' and not isinstance(val,datetime.datetime):
+                val = datetime.datetime.fromisoformat(val)
+            elif key == 'bonus_values':
+                unknown = set(val) - set(self.bonus_values)
+                if unknown:
+                    raise KeyError('Unknown bonus {!s}'.format(', '.join(sorted(unknown))))
+                vals    = OrderedDict(self.bonus_values)
+                vals.update(val)
+                val     = vals
+            setattr(self,key,val)
+
+    def replace(self,name=None,**changes):
+        """
+        Copy of this rule set with `changes` applied.
+        """
+        rules = copy.deepcopy(self)
+        if name is not None:
+            rules.name = name
+        rules.update(changes)
+        return rules
+
+    @property
+    def valid_modes(self):
+        return self.cw_modes + self.ph_modes
+
+    def params(self):
+        """
+        The rules as JSON-serializable values (for checkpoint keys and
+        reports); the name is left out.
+        """
+        params = OrderedDict()
+        for key, val in self.__dict__.items():
+            if key == 'name':
+                continue
+            if isinstance(val,datetime.timedelta):
+                val = val.total_seconds()/60.
+            elif isinstance(val,datetime.datetime):
+                val = val.isoformat()
+            params[key] = val
+        return params
+
+    def __repr__(self):
+        return 'RuleSet({!r})'.format(self.name)
+
+def load_rulesets(fpath):
+    """
+    Read a JSON list of rule variants. Each entry holds a name and the rules
+    it changes from the published rule set.
+    """
+    with open(fpath) as fl:
+        entries = json.load(fl,object_pairs_hook=OrderedDict)
+    rulesets = []
+    for inx, entry in enumerate(entries):
+        entry   = OrderedDict(entry)
+        name    = entry.pop('name','variant_{:d}'.format(inx))
+        rulesets.append(RuleSet(name,**entry))
+    return rulesets
+
+def load_ruleset(fpath):
+    """
+    Read one rule set: a JSON object of the rules it changes from the
+    published rule set, or a list with one such entry.
+    """
+    with open(fpath) as fl:
+        entry   = json.load(fl,object_pairs_hook=OrderedDict)
+    if isinstance(entry,list):
+        if len(entry) != 1:
+            raise ValueError('{!s} holds {:d} rule sets; score one at a time or use `variants`.'.format(fpath,len(entry)))
+        entry   = entry[0]
+    entry   = OrderedDict(entry)
+    name    = entry.pop('name',os.path.splitext(os.path.basename(fpath))[0])
+    return RuleSet(name,**entry)
@@ -0,0 +1,127 @@
+"""
+The per-call score table: QSO points (RULE 1), grid square multipliers
+(RULE 2) and the grand totals.
+"""
+from collections import OrderedDict
+
+import pandas as pd
+
+bonus_columns   = ['operated_totality','operated_outdoors','operated_public',
+                   'ground_conductivity','antenna_design','erpd','skimmers','iq_data']
+
+def call_table(df_seqp,index,bands,sources,verbose=True):
+    """
+    One row per call in df_seqp with its grid square, single_op flag and
+    number of submitted QSOs, and every score column set to 0. Calls without
+    a grid square are left out. `index` is the CallIndex of df_seqp.
+    """
+    df_list = []
+    for call in index.calls:
+        # Get grid square.
+        df_tmp  = df_seqp.iloc[index.slice(call)]
+        grids   = df_tmp['grid_0'].unique()
+        assert len(grids) == 1, 'More than 1 grid square for {!s}'.format(call)
+
+        grid    = grids[0]
+        if pd.isnull(grid):
+            continue
+
+        grid    = grid[:4].upper()
+
+        single_op   = df_tmp['single_op'].unique()
+        single_op   = bool(single_op[0])
+        if verbose:
+            print(call,single_op)
+
+        row_dct = OrderedDict()
+        row_dct['call']                 = call
+        row_dct['single_op']            = single_op
+        row_dct['grid']                 = grid
+        row_dct['qsos_submitted']       = len(df_tmp)
+        row_dct['dupes']                = 0
+        row_dct['cw_dig_qso_pts']       = 0
+        row_dct['ph_qso_pts']           = 0
+        row_dct['cw_dig_qso']           = 0
+        row_dct['ph_qso']               = 0
+        for band in bands:
+            key = 'gs_{:d}'.format(band)
+            row_dct[key]                = 0
+        for key in bonus_columns + sources:
+            row_dct[key]                = 0
+        df_list.append(row_dct)
+    return pd.DataFrame(df_list)
+
+def qso_points(df_seqp,calls,cw_modes,ph_modes,cw_points=2,ph_points=1):
+    """
+    RULE 1: 1 point per Phone QSO, 2 points per CW/Digital QSO, from one
+    count of valid QSOs by (call_0, mode class).
+
+    Returns a DataFrame indexed by `calls` with the ph_qso, cw_dig_qso,
+    ph_qso_pts, cw_dig_qso_pts and total_qso_pts columns.
+    """
+    mode_class  = {}
+    mode_class.update({x:'ph_qso' for x in ph_modes})
+    mode_class.update({x:'cw_dig_qso' for x in cw_modes})
+
+    cls         = df_seqp['mode'].map(mode_class)
+    df_pts      = df_seqp.groupby([df_seqp['call_0'],cls],observed=True).size().unstack()
+    df_pts      = df_pts.reindex(index=calls,columns=['ph_qso','cw_dig_qso']).fillna(0).astype(int)
+    df_pts.columns.name         = None
+
+    df_pts['ph_qso_pts']        = df_pts['ph_qso']*ph_points
+    df_pts['cw_dig_qso_pts']    = df_pts['cw_dig_qso']*cw_points
+    df_pts['total_qso_pts']     = df_pts['ph_qso_pts'] + df_pts['cw_dig_qso_pts']
+    return df_pts
+
+def grid_multipliers(df_seqp,calls,bands):
+    """
+    RULE 2: 4-character grid squares (grid_1_4char) are counted once per
+    band, from one nunique by (call_0, band).
+
+    Returns a DataFrame indexed by `calls` with one gs_<band> column per band.
+    """
+    dft         = df_seqp[df_seqp['band'].isin(bands)]
+    gs          = dft.groupby(['call_0','band'],observed=True)['grid_1_4char'].nunique().unstack()
+    gs          = gs.reindex(index=calls,columns=bands).fillna(0).astype(int)
+    gs.columns  = ['gs_{:d}'.format(band) for band in bands]
+    return gs
+
+def score_qsos(df_seqp,calls,cw_modes,ph_modes,bands):
+    """
+    Score the valid QSOs in df_seqp: qso_points() joined with
+    grid_multipliers(), indexed by `calls`.
+    """
+    return qso_points(df_seqp,calls,cw_modes,ph_modes).join(grid_multipliers(df_seqp,calls,bands))
+
+def totals(df_out,bands,sources):
+    """
+    Add the valid QSO, grid square, spot bonus, bonus and grand totals to a
+    score table, in place.
+    """
+    # Total Valid QSOs
+    df_out['qsos_valid']        = df_out[['cw_dig_qso','ph_qso']].sum(1)
+
+    # Grid Square Bonus Total
+    keys                        = ['gs_{!s}'.format(x) for x in bands]
+    df_out['total_gs']          = df_out[keys].sum(1)
+
+    # Spot Bonus Total
+    df_out['total_spot_bonus']  = df_out[sources].sum(1)
+
+    # Total Bonus Points
+    df_out['total_bonus']       = df_out[bonus_columns + ['total_spot_bonus']].sum(1)
+
+    df_out['total']             = (df_out['total_qso_pts'] * df_out['total_gs']) + df_out['total_bonus']
+    df_out['qsos_dropped']      = df_out['qsos_submitted'] - df_out['qsos_valid']
+    return df_out
+
+def score_columns(bands,sources):
+    """
+    Column order of seqp_scores.csv.
+    """
+    keys = ['call','total_qso_pts','total_gs','total_bonus','total','single_op',
+            'qsos_submitted','qsos_dropped','qsos_valid','dupes',
+            'ph_qso','cw_dig_qso','ph_qso_pts','cw_dig_qso_pts']
+    keys += ['gs_{:d}'.format(band) for band in bands]
+    keys += bonus_columns + sources + ['total_spot_bonus']
+    return keys
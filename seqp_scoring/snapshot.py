@@ -0,0 +1,133 @@
+"""
+Local snapshots of the seqp_* tables that the submission bonuses use.
+
+After the submission deadline hamsci_rsrch hardly changes, so the tables read
+by bonuses.fetch_tables() are saved as Feather files next to the CSV cache,
+together with a change token: the row count and largest submitter_id of every
+table and the latest `entered` time of seqp_submissions, all fetched in a
+single query. The submission form only ever inserts rows, so a matching token
+means the snapshot is current.
+
+Modes:
+    auto:       query the token; reuse the snapshot if it matches, otherwise
+                fetch the tables and save a new snapshot.
+    offline:    reuse the snapshot without touching the database.
+    refresh:    fetch the tables and save a new snapshot.
+    off:        fetch the tables and leave the snapshot alone.
+
+pyarrow is optional. Without it every mode except offline fetches the tables.
+"""
+import json
+import os
+import shutil
+from collections import OrderedDict
+
+from . import db as dbapi
+from .bonuses import build_submissions, fetch_tables
+from .defaults import snapshot_dir, snapshot_modes
+
+try:
+    import pyarrow.feather as feather
+except ImportError:
+    feather = None
+
+token_name      = 'token.json'
+
+def source_id(config):
+    """
+    The database a snapshot was taken from, so that snapshots of different
+    databases are never mixed up.
+    """
+    if config['backend'].lower() == 'sqlite':
+        return 'sqlite:{!s}:{!s}'.format(config['path'],config['dump'])
+    return 'mysql:{!s}@{!s}:{!s}/{!s}'.format(config['user'],config['host'],config['port'],config['database'])
+
+def change_token(db):
+    """
+    Cheap change token of the seqp_* tables, from one round trip.
+    """
+    cols    = OrderedDict()
+    for table in dbapi.seqp_tables:
+        cols['{!s}.count'.format(table)]    = 'SELECT COUNT(*) FROM {!s}'.format(table)
+        cols['{!s}.max_id'.format(table)]   = 'SELECT MAX(submitter_id) FROM {!s}'.format(table)
+    cols['seqp_submissions.max_entered']    = 'SELECT MAX(entered) FROM seqp_submissions'
+    qry     = 'SELECT {!s}'.format(', '.join('({!s})'.format(x) for x in cols.values()))
+    row     = dbapi.query(db,qry)[0]
+    return OrderedDict((key,None if val is None else str(val)) for key, val in zip(cols.keys(),row))
+
+def read_token(path=snapshot_dir):
+    fpath = os.path.join(path,token_name)
+    if not os.path.exists(fpath):
+        return None
+    with open(fpath) as fl:
+        return json.load(fl,object_pairs_hook=OrderedDict)
+
+def read_snapshot(path=snapshot_dir):
+    """
+    Load the tables of a snapshot as an OrderedDict of DataFrames.
+    """
+    tables = OrderedDict()
+    for table in dbapi.seqp_tables:
+        tables[table] = feather.read_feather(os.path.join(path,'{!s}.feather'.format(table)))
+    return tables
+
+def write_snapshot(tables,token,path=snapshot_dir):
+    """
+    Save `tables` and their token. The snapshot is written to a temporary
+    directory and swapped in, so an interrupted run leaves the old one.
+    """
+    tmp_path = path+'.tmp'
+    shutil.rmtree(tmp_path,ignore_errors=True)
+    os.makedirs(tmp_path)
+    for table, df in tables.items():
+        df.reset_index(drop=True).to_feather(os.path.join(tmp_path,'{!s}.feather'.format(table)))
+    with open(os.path.join(tmp_path,token_name),'w') as fl:
+        json.dump(token,fl,indent=1)
+    shutil.rmtree(path,ignore_errors=True)
+    os.replace(tmp_path,path)
+
+def load_tables(config=None,mode='auto',path=snapshot_dir,verbose=True):
+    """
+    The tables df_sub is built from, from the snapshot or the database
+    depending on `mode`. `config` is a database config (see db.read_config).
+    A snapshot that is used is named if `verbose`.
+    """
+    if mode not in snapshot_modes:
+        raise ValueError('Unknown snapshot mode {!s}'.format(mode))
+    if config is None or isinstance(config,str):
+        config = dbapi.read_config(config)
+    source  = source_id(config)
+    saved   = read_token(path)
+
+    if mode == 'offline':
+        if feather is None:
+            raise RuntimeError('pyarrow is needed to read a database snapshot.')
+        if saved is None or saved['source'] != source:
+            raise RuntimeError('No snapshot of {!s} in {!s}; run with a database first.'.format(source,path))
+        if verbose:
+            print('Using database snapshot from {!s}.'.format(path))
+        return read_snapshot(path)
+
+    db      = dbapi.connect(config)
+    try:
+        use_snapshot = feather is not None and mode != 'off'
+        if use_snapshot:
+            token           = change_token(db)
+            token['source'] = source
+            if mode == 'auto' and saved == token:
+                if verbose:
+                    print('Database unchanged; using snapshot from {!s}.'.format(path))
+                return read_snapshot(path)
+        tables  = fetch_tables(db)
+    finally:
+        db.close()
+
+    if use_snapshot:
+        write_snapshot(tables,token,path)
+    return tables
+
+def load_submissions(config=None,mode='auto',path=snapshot_dir,verbose=True):
+    """
+    df_sub (see bonuses.build_submissions), through the snapshot.
+    """
+    return build_submissions(load_tables(config,mode,path,verbose))
@@ -0,0 +1,65 @@
+"""
+Spot bonus (BONUS 9).
+
+"9. One bonus point will be awarded for each band and clock hour during which
+    your signal was spotted in a grid square other than your own by the RBN,
+    PSKReporter, or DX spotting network. There are eight clock hours and 7
+    bands available for receiving bonus points. A spot of your signal on any
+    mode will qualify for the bonus point."
+"""
+import numpy as np
+import pandas as pd
+
+spot_sources    = ['pskreporter','rbn','dxcluster']
+spot_hours      = 8
+
+def bin_spots(df,sTime,calls,bands,sources=spot_sources,hours=spot_hours,mask=None):
+    """
+    Select the spots of `calls` on `bands` from `sources` and bin each one to
+    an integer clock hour offset from sTime. Spots outside of the `hours`
+    hour window are dropped, as are rows where the boolean `mask` is False.
+    calls=None keeps the spots of every call.
+
+    Returns a DataFrame with the source, call_1, band, hour and grid_0_4char
+    columns.
+    """
+    tf      = np.logical_and(df['source'].isin(sources).values,df['band'].isin(bands).values)
+    if calls is not None:
+        tf  = np.logical_and(tf,df['call_1'].isin(calls).values)
+    if mask is not None:
+        tf  = np.logical_and(tf,mask)
+    dft     = df[tf]
+
+    hour    = (dft['datetime'].values - np.datetime64(sTime)) // np.timedelta64(1,'h')
+    tf      = np.logical_and(hour >= 0, hour < hours)
+    dft     = dft[tf]
+
+    if 'grid_0_4char' in dft:
+        grid_4  = dft['grid_0_4char']
+    else:
+        grid_4  = dft['grid_0'].astype(str).str[:4]
+
+    df_bin  = pd.DataFrame({'source':dft['source'].values,'call_1':dft['call_1'].values,
+                'band':dft['band'].values,'hour':hour[tf],'grid_0_4char':grid_4.values})
+    return df_bin
+
+def spot_bonus(df_bin,calls,grids,sources=spot_sources):
+    """
+    Count the distinct spotter grid squares per (source, call_1, band, hour)
+    in binned spots, ignoring spots from the station's own grid square.
+
+    `grids` holds the 4-character grid square of each call in `calls`.
+    Returns a DataFrame indexed by `calls` with one column per source.
+    """
+    # Compare grid codes: the station's grid is looked up per call_1 category
+    # and recoded into the spotter grid vocabulary (-1 if nobody spotted from it).
+    grid_4  = df_bin['grid_0_4char'].astype('category')
+    own     = df_bin['call_1'].astype('category').map(dict(zip(calls,grids)))
+    own     = pd.Categorical(own,categories=grid_4.cat.categories).codes
+    dft     = df_bin[own != grid_4.cat.codes.values]
+    dft     = dft.drop_duplicates(['source','call_1','band','hour','grid_0_4char'])
+
+    df_spot = dft.groupby(['call_1','source'],observed=True).size().unstack()
+    df_spot = df_spot.reindex(index=calls,columns=sources).fillna(0).astype(int)
+    df_spot.columns.name = None
+    return df_spot
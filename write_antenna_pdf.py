@@ -1,7 +1,8 @@
 #!/usr/bin/env python3
 import string
-import shutil,os
-import mysql.connector
+
+from seqp_scoring.blobs import BlobWriter
+from seqp_scoring.db import connect, stream
 
 def format_filename(s):
     """Take a string and return a valid filename constructed from the string.
@@ -21,33 +22,20 @@ an invalid filename.
     return filename
 
 ant_dir = 'antenna_pdfs'
-if os.path.exists(ant_dir):
-    shutil.rmtree(ant_dir)
-os.makedirs(ant_dir)
-
-user        = 'hamsci'
-password    = 'hamsci'
-host        = 'localhost'
-database    = 'hamsci_rsrch'
-db          = mysql.connector.connect(user=user,password=password,host=host,database=database,buffered=True)
 
-qry     = ("SELECT * FROM seqp_submissions ")
-crsr    = db.cursor()
-crsr.execute(qry)
-results = crsr.fetchall()
-columns = crsr.column_names
-crsr.close()
+db          = connect()
 
-keys    = dict(zip(columns,range(len(columns))))
-for result in results:
-    callsign        = result[keys['callsign']]
-    dsn_fname       = result[keys['dsn_fname']]
-    submitted_dsn   = result[keys['submitted_dsn']]
-    if dsn_fname is not None:
+# Only pull the columns we need, one small batch of rows at a time, so that
+# memory is bounded by the largest PDF rather than by the whole table. PDFs
+# that have not changed since the last run are not rewritten, and PDFs that
+# are gone from the table are removed from ant_dir.
+qry     = ("SELECT callsign, dsn_fname, submitted_dsn FROM seqp_submissions "
+           "WHERE dsn_fname IS NOT NULL ORDER BY submitter_id")
+with BlobWriter(ant_dir) as writer:
+    for callsign, dsn_fname, submitted_dsn in stream(db,qry):
         print(callsign,dsn_fname)
 
-        
         fname   = format_filename('{!s}_{!s}'.format(callsign.upper(),dsn_fname))
-        fpath   = os.path.join(ant_dir,fname)
-        with open(fpath,'wb') as fl:
-            fl.write(submitted_dsn)
+        writer.write(fname,submitted_dsn)
+print('{:d} unchanged PDFs skipped.'.format(writer.skipped))
+db.close()
@@ -1,11 +1,13 @@
 #!/usr/bin/env python3
 import string
 from collections import OrderedDict
-import shutil,os
-import mysql.connector
+import os, sys
 import pandas as pd
 
-import seqp
+sys.path.insert(0,os.path.join(os.path.dirname(os.path.abspath(__file__)),'..'))
+from seqp_scoring.blobs import BlobWriter
+from seqp_scoring.db import connect, placeholders, query, read_frame, stream
+from seqp_scoring.locator import grid_case, grids2latlon
 
 pd.set_option('display.max_rows', 1000)
 pd.set_option('display.width', 1000)
@@ -21,18 +23,6 @@ def delete_station(df,submitter_id):
     df  = df[tf].copy()
     return df
 
-def grid_case(grid):
-    """
-    Correct case of grid sqaures.
-    """
-    try:
-        grid = grid[:2].upper() + grid[2:]
-        grid = grid[:-2] + grid[-2:].lower()
-    except:
-        pass
-    return grid
-
-
 def format_filename(s):
     """Take a string and return a valid filename constructed from the string.
 Uses a whitelist approach: any characters not present in valid_chars are
@@ -55,20 +45,9 @@ def clean_call(callsign):
     return call
 
 log_dir = 'log_files'
-if os.path.exists(log_dir):
-    shutil.rmtree(log_dir)
-os.makedirs(log_dir)
-
 dsn_dir = 'station_descriptions'
-if os.path.exists(dsn_dir):
-    shutil.rmtree(dsn_dir)
-os.makedirs(dsn_dir)
 
-user        = 'hamsci'
-password    = 'hamsci'
-host        = 'localhost'
-database    = 'hamsci_rsrch'
-db          = mysql.connector.connect(user=user,password=password,host=host,database=database,buffered=True,use_pure=True)
+db          = connect(use_pure=True)
 
 #cols = []
 #cols.append('submitter_id')
@@ -94,13 +73,6 @@ db          = mysql.connector.connect(user=user,password=password,host=host,data
 #cols.append('entered')
 #qry     = ("SELECT {!s} FROM seqp_submissions;".format(','.join(cols)))
 
-qry     = ("SELECT * FROM seqp_submissions;")
-crsr    = db.cursor()
-crsr.execute(qry)
-results = crsr.fetchall()
-columns = crsr.column_names
-crsr.close()
-
 cols = OrderedDict()
 cols['submitter_id']    = 'submitter_id'
 cols['callsign']        = 'callsign'
@@ -113,26 +85,13 @@ cols['log_fname']       = 'log_filename'
 cols['dsn_fname']       = 'station_description_filename'
 #cols['entered']         = 'entered'
 
-keys    = dict(zip(columns,range(len(columns))))
-df_lst  = []
-
-log_files   = {}
-dsn_files   = {}
-for result in results:
-    tmp = {}
-    for col in cols.keys():
-        if col in ['lat_calculated','lon_calculated']:
-            tmp[col] = 'NaN'
-        else:
-            tmp[col]    = result[keys[col]]
-    df_lst.append(tmp)
-
-    sId             = result[keys['submitter_id']]
-    dsn_files[sId]  = result[keys['submitted_dsn']]
-    log_files[sId]  = result[keys['submitted_log']]
-
-
-df  = pd.DataFrame(df_lst)
+# Phase 1: fetch only the metadata columns (no blobs) to decide which rows are
+# exported and under which file names.
+meta_cols   = [x for x in cols.keys() if x not in ['lat_calculated','lon_calculated']]
+qry         = ("SELECT {!s} FROM seqp_submissions ORDER BY submitter_id;".format(', '.join(meta_cols)))
+df  = read_frame(db,qry)
+df['lat_calculated']    = 'NaN'
+df['lon_calculated']    = 'NaN'
 df  = df[list(cols.keys())].copy()
 
 # Remove log filenames for IDs <= 293 due to a collection bug.
@@ -162,50 +121,60 @@ df  = delete_station(df,785)
 df  = delete_station(df,527)
 
 # Calculate Grid Square
-df_lst  = []
-for rinx,row in df.iterrows():
-    row['per_gs'] = grid_case(row['per_gs'])
-
-    try:
-        latlon  = seqp.locator.gridsquare2latlon(row['per_gs'])
-        row['lat_calculated']   = '{:.04f}'.format(latlon[0])
-        row['lon_calculated']   = '{:.04f}'.format(latlon[1])
-    except:
-        pass
-    df_lst.append(row)
-df  = pd.DataFrame(df_lst)
+df['per_gs']    = df['per_gs'].map(grid_case)
+lat, lon, valid = grids2latlon(df['per_gs'])
+df.loc[valid,'lat_calculated']  = ['{:.04f}'.format(x) for x in lat[valid]]
+df.loc[valid,'lon_calculated']  = ['{:.04f}'.format(x) for x in lon[valid]]
 
 # Reset the index
 df  = df.sort_values('callsign')
 df.index    = range(len(df))
-df_lst  = []
+df_lst      = []
+log_jobs    = OrderedDict()
+dsn_jobs    = OrderedDict()
 for rinx,row in df.iterrows():
     callsign    = clean_call(row['callsign'])
     pfx         = '{:03d}_{!s}'.format(rinx,callsign)
     sId             = row['submitter_id']
     log_fname       = row['log_fname']
-    log_file        = log_files[sId]
 
     if log_fname is not None:
         fname   = format_filename('{!s}_{!s}'.format(pfx,log_fname))
-        fpath   = os.path.join(log_dir,fname)
         row['log_fname'] = fname
-        print(fpath)
-        with open(fpath,'wb') as fl:
-            fl.write(log_file)
+        log_jobs[sId]    = fname
 
     dsn_fname       = row['dsn_fname']
-    dsn_file        = dsn_files[sId]
 
     if dsn_fname is not None:
         fname   = format_filename('{!s}_{!s}'.format(pfx,dsn_fname))
-        fpath   = os.path.join(dsn_dir,fname)
         row['dsn_fname'] = fname
-        print(fpath)
-        with open(fpath,'wb') as fl:
-            fl.write(dsn_file)
+        dsn_jobs[sId]    = fname
     df_lst.append(row)
 
+# Phase 2: fetch the SHA-1 of the blobs of the exported rows, computed by the
+# database, and stream only the blobs that changed since the last run (see
+# BlobWriter.keep).
+def write_blobs(out_dir,blob_col,jobs):
+    if len(jobs) == 0:
+        with BlobWriter(out_dir):
+            return
+    ids = [int(x) for x in jobs.keys()]
+    # A NULL blob is written as an empty file.
+    qry = "SELECT submitter_id, SHA1(COALESCE({!s},'')) FROM seqp_submissions WHERE submitter_id IN ({!s})".format(blob_col,placeholders(len(ids)))
+    sha1s   = dict(query(db,qry,ids))
+    with BlobWriter(out_dir) as writer:
+        ids = [x for x in ids if not writer.keep(jobs[x],sha1s.get(x))]
+        if len(ids) > 0:
+            qry = 'SELECT submitter_id, {!s} FROM seqp_submissions WHERE submitter_id IN ({!s})'.format(blob_col,placeholders(len(ids)))
+            for sId, blob in stream(db,qry,ids):
+                fname = jobs[sId]
+                print(os.path.join(out_dir,fname))
+                writer.write(fname,blob if blob is not None else b'')
+    print('{:d} unchanged files skipped in {!s}.'.format(writer.skipped,out_dir))
+
+write_blobs(log_dir,'submitted_log',log_jobs)
+write_blobs(dsn_dir,'submitted_dsn',dsn_jobs)
+
 df  = pd.DataFrame(df_lst)
 df  = df[list(cols.keys())].copy()
 df.index.name = 'index'
@@ -213,4 +182,4 @@ df.index.name = 'index'
 del df['submitter_id']
 df  = df.rename(columns=cols)
 df.to_csv('station_info.csv')
-import ipdb; ipdb.set_trace()
+db.close()